@@ -0,0 +1,736 @@
+import argparse
+import glob
+import os
+import re
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance
+
+# Ensure project root is on sys.path for "utils" imports when run directly
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import utils.adb_utils as adb_utils  # noqa: E402
+import utils.location_priors as location_priors  # noqa: E402
+from core.recognizer import count_templates, deduplicate_boxes  # noqa: E402
+from utils.adb_client import ADBHostClient  # noqa: E402
+from utils.adb_utils import ADBController  # noqa: E402
+from utils.capture import Frame, crop_region  # noqa: E402
+from utils.image_recognition import (  # noqa: E402
+    BEST_SCALES,
+    locate_center_on_phone,
+    non_maximum_suppression,
+    pyramid_match_on_frame,
+    scaled_search_area,
+)
+from utils.constants import get_regions_for_mode  # noqa: E402
+from utils.digit_reader import DigitReader, extract_glyphs  # noqa: E402
+from utils.nms import peak_points  # noqa: E402
+from utils.screenshot import enhance_for_ocr  # noqa: E402
+from utils.support_classifier import SUPPORT_TYPE_ICONS, get_support_classifier  # noqa: E402
+from utils.templates import load_template  # noqa: E402
+
+
+def time_calls(fn, iterations: int) -> float:
+    """Return the mean wall time of fn() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+class FakeADBServer:
+    """Minimal adb server speaking the host protocol for one fake device.
+
+    Answers `host:version`, `host:devices`, `host:connect`, `host:transport`
+    and the `shell:` / `exec:` services with canned output, so the socket
+    backend of ADBController can be exercised without an emulator.
+    """
+
+    def __init__(self, serial: str = "127.0.0.1:16384", width: int = 720, height: int = 1280):
+        self.serial = serial
+        self.frame = np.zeros((height, width, 4), np.uint8)
+        self.commands = []
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen(16)
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            conn, _ = self._server.accept()
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _read_request(conn):
+        header = conn.recv(4, socket.MSG_WAITALL)
+        if len(header) < 4:
+            return None
+        return conn.recv(int(header, 16), socket.MSG_WAITALL).decode("utf-8")
+
+    @staticmethod
+    def _reply(conn, payload: str):
+        data = payload.encode("utf-8")
+        conn.sendall(b"OKAY" + b"%04x" % len(data) + data)
+
+    def _handle(self, conn):
+        with conn:
+            request = self._read_request(conn)
+            if request == "host:version":
+                self._reply(conn, "%04x" % 41)
+            elif request == "host:devices":
+                self._reply(conn, f"{self.serial}\tdevice\n")
+            elif request and request.startswith("host:connect:"):
+                self._reply(conn, f"already connected to {self.serial}")
+            elif request == f"host:transport:{self.serial}":
+                conn.sendall(b"OKAY")
+                service = self._read_request(conn)
+                if service is None:
+                    return
+                conn.sendall(b"OKAY")
+                conn.sendall(self._run_service(service))
+            else:
+                message = b"unknown request"
+                conn.sendall(b"FAIL" + b"%04x" % len(message) + message)
+
+    def _run_service(self, service: str) -> bytes:
+        self.commands.append(service)
+        if service == "exec:screencap":
+            height, width = self.frame.shape[:2]
+            return struct.pack("<IIII", width, height, 1, 0) + self.frame.tobytes()
+        if service.startswith("shell:"):
+            command = service[len("shell:") :]
+            output = ""
+            if command.startswith("wm size"):
+                height, width = self.frame.shape[:2]
+                output = f"Physical size: {width}x{height}\r\n"
+            marker = re.search(r"echo (\S+) \$\?$", command)
+            if marker:
+                output += f"{marker.group(1)} 0\r\n"
+            return output.encode("utf-8")
+        return b""
+
+
+def benchmark_adb(args):
+    if args.real:
+        host, port = args.serial.split(":")
+        client = ADBHostClient()
+    else:
+        server = FakeADBServer(args.serial)
+        host, port = args.serial.split(":")
+        client = ADBHostClient(port=server.port)
+        print(f"[BENCH] Fake adb server listening on port {server.port}")
+
+    controller = ADBController(host, int(port), backend="socket", client=client)
+    if not controller.is_connected():
+        print("[BENCH] Could not connect")
+        return
+
+    tap = time_calls(lambda: controller.click(360, 640, duration=0), args.iterations)
+    size = time_calls(controller.get_screen_size, args.iterations)
+    shot = time_calls(controller.take_screenshot, args.iterations)
+    print(f"[BENCH] socket backend, {args.iterations} iterations")
+    print(f"  tap:        {tap:.2f} ms")
+    print(f"  wm size:    {size:.2f} ms")
+    print(f"  screenshot: {shot:.2f} ms")
+
+    if args.real:
+        subprocess_controller = ADBController(host, int(port), backend="subprocess")
+        tap = time_calls(
+            lambda: subprocess_controller.click(360, 640, duration=0), args.iterations
+        )
+        shot = time_calls(subprocess_controller.take_screenshot, args.iterations)
+        print("[BENCH] subprocess backend")
+        print(f"  tap:        {tap:.2f} ms")
+        print(f"  screenshot: {shot:.2f} ms")
+
+
+# (template, confidence, scale) as searched during race selection
+PYRAMID_CASES = [
+    ("assets/ui/match_track.png", 0.8, BEST_SCALES),
+    ("assets/ui/g1_race.png", 0.85, 1.0),
+]
+
+
+def synthetic_frames(count: int, width: int = 720, height: int = 1280, seed: int = 0):
+    """Phone-sized frames of smooth noise with 0-3 pasted copies of every
+    pyramid test template, at the size the matcher expects on screen"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        noise = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+        image = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+        for template_path, _, scale in PYRAMID_CASES:
+            template = load_template(template_path)
+            template = cv2.resize(
+                template, None, fx=1 / scale, fy=1 / scale, interpolation=cv2.INTER_CUBIC
+            )
+            tH, tW = template.shape[:2]
+            for _ in range(rng.integers(0, 4)):
+                x = int(rng.integers(0, width - tW))
+                y = int(rng.integers(0, height - tH))
+                image[y : y + tH, x : x + tW] = template
+        frames.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    return frames
+
+
+def full_scale_boxes(frame, template_path, confidence, scale):
+    """Reference result: every TM_CCOEFF_NORMED hit over the whole frame"""
+    template = load_template(template_path)
+    resized, _, _ = scaled_search_area(frame, None, scale)
+    result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
+    ys, xs = np.where(result >= confidence)
+    h, w = template.shape[:2]
+    return deduplicate_boxes([(int(x), int(y), w, h) for x, y in zip(xs, ys)])
+
+
+def pyramid_boxes(frame, template_path, confidence, scale):
+    matches = pyramid_match_on_frame(frame, template_path, confidence, scale=scale, top_k=8)
+    template = load_template(template_path)
+    h, w = template.shape[:2]
+    # Back to positions in the scaled frame, in np.where's row-major order
+    points = sorted(
+        (int(round(y * scale)), int(round(x * scale))) for _, (x, y, _, _) in matches
+    )
+    return deduplicate_boxes([(x, y, w, h) for y, x in points])
+
+
+def same_boxes(expected, actual, tolerance: int = 2) -> bool:
+    if len(expected) != len(actual):
+        return False
+    return all(
+        any(abs(ex - ax) <= tolerance and abs(ey - ay) <= tolerance for ax, ay, _, _ in actual)
+        for ex, ey, _, _ in expected
+    )
+
+
+def benchmark_pyramid(args):
+    if args.frames:
+        paths = sorted(glob.glob(os.path.join(args.frames, "*.png")))
+        corpus = [cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB) for path in paths]
+        print(f"[BENCH] {len(corpus)} frames from {args.frames}")
+    else:
+        corpus = synthetic_frames(args.synthetic)
+        print(f"[BENCH] {len(corpus)} synthetic frames")
+    if not corpus:
+        return
+
+    # Location priors would short-circuit both matchers
+    location_priors.LOCATION_PRIORS = False
+
+    print("[BENCH] Accuracy parity with full-scale TM_CCOEFF_NORMED")
+    for template_path, confidence, scale in PYRAMID_CASES:
+        mismatches = 0
+        found = 0
+        for rgb in corpus:
+            expected = full_scale_boxes(Frame(rgb, time.time()), template_path, confidence, scale)
+            actual = pyramid_boxes(Frame(rgb, time.time()), template_path, confidence, scale)
+            found += len(expected)
+            if not same_boxes(expected, actual):
+                mismatches += 1
+                print(f"  mismatch {template_path}: expected {expected}, got {actual}")
+        print(
+            f"  {template_path}: {len(corpus) - mismatches}/{len(corpus)} frames identical "
+            f"({found} reference matches)"
+        )
+
+    # locate_center_on_phone needs a connected controller, serve the corpus
+    # frames through a fake adb server
+    server = FakeADBServer()
+    host, port = server.serial.split(":")
+    adb_utils._adb_controller = ADBController(
+        host, int(port), backend="socket", client=ADBHostClient(port=server.port)
+    )
+
+    print(f"[BENCH] locate_center_on_phone, {args.iterations} iterations per frame")
+    for template_path, confidence, scale in PYRAMID_CASES:
+        if scale != BEST_SCALES:
+            continue
+        timings = {False: [], True: []}
+        for rgb in corpus:
+            server.frame = cv2.cvtColor(rgb, cv2.COLOR_RGB2RGBA)
+            for pyramid in timings:
+                # A fresh frame per call so both pay for their downscaled copies
+                timings[pyramid].append(
+                    time_calls(
+                        lambda: locate_center_on_phone(
+                            template_path,
+                            confidence,
+                            # A single attempt, frames without the template
+                            # would otherwise retry for the whole search time
+                            min_search_time=0.01,
+                            frame=Frame(rgb, time.time()),
+                            pyramid=pyramid,
+                        ),
+                        args.iterations,
+                    )
+                )
+        print(f"  {template_path}")
+        print(f"    full scale: {np.median(timings[False]):.2f} ms (median)")
+        print(f"    pyramid:    {np.median(timings[True]):.2f} ms (median)")
+
+    print(f"[BENCH] Matcher only, {args.iterations} iterations per frame")
+    for template_path, confidence, scale in PYRAMID_CASES:
+        full = np.median(
+            [
+                time_calls(
+                    lambda: full_scale_boxes(Frame(rgb, time.time()), template_path, confidence, scale),
+                    args.iterations,
+                )
+                for rgb in corpus
+            ]
+        )
+        coarse = np.median(
+            [
+                time_calls(
+                    lambda: pyramid_boxes(Frame(rgb, time.time()), template_path, confidence, scale),
+                    args.iterations,
+                )
+                for rgb in corpus
+            ]
+        )
+        print(f"  {template_path}: full scale {full:.2f} ms, pyramid {coarse:.2f} ms")
+
+
+def reference_deduplicate_boxes(boxes, min_dist=5):
+    """The former pure-Python deduplicate_boxes"""
+    filtered = []
+    for x, y, w, h in boxes:
+        cx, cy = x + w // 2, y + h // 2
+        if all(
+            abs(cx - (fx + fw // 2)) > min_dist or abs(cy - (fy + fh // 2)) > min_dist
+            for fx, fy, fw, fh in filtered
+        ):
+            filtered.append((x, y, w, h))
+    return filtered
+
+
+def reference_non_maximum_suppression(matches, overlap_threshold=0.3):
+    """The former pure-Python non_maximum_suppression"""
+
+    def calculate_iou(box1, box2):
+        x1, y1, w1, h1 = box1
+        x2, y2, w2, h2 = box2
+        x_left, y_top = max(x1, x2), max(y1, y2)
+        x_right, y_bottom = min(x1 + w1, x2 + w2), min(y1 + h1, y2 + h2)
+        if x_right < x_left or y_bottom < y_top:
+            return 0.0
+        intersection = (x_right - x_left) * (y_bottom - y_top)
+        union = w1 * h1 + w2 * h2 - intersection
+        return intersection / union if union > 0 else 0.0
+
+    kept_matches = []
+    for match in sorted(matches, key=lambda x: x["confidence"], reverse=True):
+        if all(
+            calculate_iou(match["location"], kept["location"]) <= overlap_threshold
+            for kept in kept_matches
+        ):
+            kept_matches.append(match)
+    return kept_matches
+
+
+def dense_score_map(width: int = 600, height: int = 1000, seed: int = 0) -> np.ndarray:
+    """A smooth correlation-like map in [-1, 1] with broad high plateaus,
+    like the support icon search at low thresholds"""
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((height // 8, width // 8)).astype(np.float32)
+    smooth = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    return np.tanh(smooth / 2)
+
+
+def benchmark_nms(args):
+    result = dense_score_map()
+    w, h = 40, 40
+    for threshold in args.thresholds:
+        ys, xs = np.where(result >= threshold)
+        boxes = [(int(x), int(y), w, h) for x, y in zip(xs, ys)]
+        matches = [
+            {"confidence": float(result[box[1], box[0]]), "location": box, "center": box[:2]}
+            for box in boxes[: args.nms_points]
+        ]
+        print(f"[BENCH] threshold {threshold}: {len(boxes)} points above threshold")
+
+        same = deduplicate_boxes(boxes) == reference_deduplicate_boxes(boxes)
+        old = time_calls(lambda: reference_deduplicate_boxes(boxes), args.iterations)
+        new = time_calls(lambda: deduplicate_boxes(boxes), args.iterations)
+        print(
+            f"  deduplicate_boxes, all points:  {old:8.2f} ms -> {new:7.2f} ms "
+            f"({old / new:.0f}x, identical: {same})"
+        )
+
+        def peaks_then_dedup():
+            px, py, _ = peak_points(result, threshold)
+            return deduplicate_boxes([(x, y, w, h) for x, y in zip(px, py)])
+
+        peak_boxes = peaks_then_dedup()
+        new = time_calls(peaks_then_dedup, args.iterations)
+        print(
+            f"  peaks + deduplicate_boxes:      {old:8.2f} ms -> {new:7.2f} ms "
+            f"({old / new:.0f}x, {len(peak_boxes)} boxes, "
+            f"{len(reference_deduplicate_boxes(boxes))} before)"
+        )
+
+        kept = [m["location"] for m in non_maximum_suppression(matches)]
+        same = kept == [m["location"] for m in reference_non_maximum_suppression(matches)]
+        old = time_calls(lambda: reference_non_maximum_suppression(matches), args.iterations)
+        new = time_calls(lambda: non_maximum_suppression(matches), args.iterations)
+        print(
+            f"  non_maximum_suppression, {len(matches)} points: {old:8.2f} ms -> "
+            f"{new:7.2f} ms ({old / new:.0f}x, identical: {same})"
+        )
+
+
+def synthetic_support_frames(region, count: int, seed: int = 0):
+    """Phone frames with 0-5 random type badges stacked in the support icon
+    column, over a pale background and large colored card portraits.
+    Returns (rgb, expected counts) pairs."""
+    rng = np.random.default_rng(seed)
+    x, y, w, h = region
+    types = list(SUPPORT_TYPE_ICONS)
+    frames = []
+    for _ in range(count):
+        # Pale, slightly tinted background like the game's menus
+        noise = rng.integers(150, 230, (1280 // 16, 720 // 16, 1), dtype=np.uint8)
+        tint = rng.integers(0, 30, (1280 // 16, 720 // 16, 3), dtype=np.uint8)
+        noise = cv2.subtract(np.repeat(noise, 3, axis=2), tint)
+        image = cv2.resize(noise, (720, 1280), interpolation=cv2.INTER_CUBIC)
+        expected = {support_type: 0 for support_type in types}
+        for slot in range(rng.integers(0, 6)):
+            top = y + 10 + slot * (h - 20) // 5
+            # Card portrait next to the badge
+            color = [int(c) for c in rng.integers(0, 256, 3)]
+            cv2.rectangle(image, (x + 45, top + 10), (x + w - 5, top + 90), color, -1)
+            support_type = types[rng.integers(0, len(types))]
+            icon = cv2.imread(SUPPORT_TYPE_ICONS[support_type], cv2.IMREAD_COLOR)
+            icon_h, icon_w = icon.shape[:2]
+            image[top : top + icon_h, x + 15 : x + 15 + icon_w] = icon
+            expected[support_type] += 1
+        frames.append((cv2.cvtColor(image, cv2.COLOR_BGR2RGB), expected))
+    return frames
+
+
+def benchmark_support(args):
+    region = tuple(get_regions_for_mode()["SUPPORT_CARD_ICON_REGION"])
+    if args.frames:
+        paths = sorted(glob.glob(os.path.join(args.frames, "*.png")))
+        corpus = [(cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB), None) for path in paths]
+        print(f"[BENCH] {len(corpus)} frames from {args.frames}, region {region}")
+    else:
+        corpus = synthetic_support_frames(region, args.synthetic)
+        print(f"[BENCH] {len(corpus)} synthetic frames, region {region}")
+
+    classifier = get_support_classifier()
+    templates = {
+        support_type: (icon_path, args.threshold)
+        for support_type, icon_path in SUPPORT_TYPE_ICONS.items()
+    }
+
+    agree = 0
+    correct = {"color": 0, "template": 0}
+    per_type = {support_type: 0 for support_type in templates}
+    color_times, template_times = [], []
+    for index, (rgb, expected) in enumerate(corpus):
+        frame = Frame(rgb, time.time())
+        crop = np.ascontiguousarray(frame.bgr[region[1] : region[1] + region[3], region[0] : region[0] + region[2]])
+        color = classifier.count(crop)
+        matched = {
+            name: len(boxes)
+            for name, boxes in count_templates(templates, region=region, frame=frame).items()
+        }
+        color_times.append(time_calls(lambda: classifier.count(crop), args.iterations))
+        template_times.append(
+            time_calls(lambda: count_templates(templates, region=region, frame=frame), args.iterations)
+        )
+
+        for support_type in templates:
+            per_type[support_type] += color[support_type] == matched[support_type]
+        if color == matched:
+            agree += 1
+        elif args.verbose:
+            print(f"  frame {index}: color {color}, template {matched}, expected {expected}")
+        if expected is not None:
+            correct["color"] += color == expected
+            correct["template"] += matched == expected
+
+    print(f"[BENCH] Color classifier agrees with template matching on {agree}/{len(corpus)} frames")
+    for support_type, same in per_type.items():
+        print(f"  {support_type}: {same}/{len(corpus)}")
+    if corpus[0][1] is not None:
+        print(
+            f"[BENCH] Exact counts: color {correct['color']}/{len(corpus)}, "
+            f"template {correct['template']}/{len(corpus)}"
+        )
+    print(f"[BENCH] Per region: color {np.median(color_times):.3f} ms, templates {np.median(template_times):.2f} ms (median)")
+
+
+def render_field(text: str, rng=None, width: int = 130, height: int = 44) -> np.ndarray:
+    """Grayscale HUD-like field: dark text on a light, slightly noisy
+    background, upscaled 2x like enhanced_screenshot"""
+    small = np.full((height // 2, width // 2), 235, np.uint8)
+    if rng is not None:
+        small = cv2.subtract(small, rng.integers(0, 25, small.shape, dtype=np.uint8))
+    cv2.putText(small, text, (2, height // 2 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, 40, 1, cv2.LINE_AA)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+
+
+def benchmark_digits(args):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as folder:
+        if args.bank:
+            reader = DigitReader(args.bank)
+        else:
+            # Synthetic bank cut from a rendered field, like `extract` on a crop
+            path = os.path.join(folder, "field.png")
+            cv2.imwrite(path, render_field("0123456789%", width=220))
+            extract_glyphs(path, "0123456789%", os.path.join(folder, "digits"))
+            reader = DigitReader(os.path.join(folder, "digits"))
+    print(f"[BENCH] {len(reader.chars)} glyph templates")
+
+    fields = []
+    for _ in range(args.fields):
+        value = int(rng.integers(0, 1200))
+        suffix = "%" if rng.random() < 0.3 else ""
+        fields.append((render_field(f"{value}{suffix}", rng), value, suffix or None))
+
+    correct = unread = 0
+    times = []
+    for gray, value, suffix in fields:
+        read, _ = reader.read_number(gray, suffix=suffix)
+        correct += read == value
+        unread += read is None
+        times.append(time_calls(lambda: reader.read_number(gray, suffix=suffix), args.iterations))
+    print(
+        f"[BENCH] Glyph reader: {correct}/{len(fields)} correct, {unread} left to OCR, "
+        f"{np.median(times):.3f} ms per field (median)"
+    )
+
+    try:
+        import easyocr
+    except ImportError:
+        print("[BENCH] easyocr is not installed, skipping the OCR comparison")
+        return
+    ocr = easyocr.Reader(["en"], gpu=False)
+    ocr_times = [
+        time_calls(lambda: ocr.recognize(gray, allowlist="0123456789%"), 1)
+        for gray, _, _ in fields[: args.ocr_fields]
+    ]
+    print(f"[BENCH] EasyOCR: {np.median(ocr_times):.1f} ms per field (median)")
+
+
+HUD_TEXTS = ["Failure 12%", "Senior Year Early Jun", "1140", "12", "NORMAL", "Fan Count 3000"]
+
+
+def benchmark_ocr(args):
+    try:
+        import easyocr
+    except ImportError:
+        print("[BENCH] easyocr is not installed, nothing to measure")
+        return
+    start = time.perf_counter()
+    recognizer = easyocr.Reader(["en"], gpu=False, detector=False)
+    recognizer_load = time.perf_counter() - start
+    start = time.perf_counter()
+    full = easyocr.Reader(["en"], gpu=False)
+    full_load = time.perf_counter() - start
+    print(
+        f"[BENCH] Model load: recognizer only {recognizer_load:.2f}s, "
+        f"with detector {full_load:.2f}s"
+    )
+
+    rng = np.random.default_rng(0)
+    for text in HUD_TEXTS:
+        gray = render_field(text, rng, width=260)
+        full.readtext(gray)
+        recognizer.recognize(gray)
+        detect_ms = time_calls(lambda: full.readtext(gray), args.iterations)
+        recognize_ms = time_calls(lambda: recognizer.recognize(gray), args.iterations)
+        detected = " ".join(item[1] for item in full.readtext(gray))
+        recognized = " ".join(item[1] for item in recognizer.recognize(gray))
+        print(
+            f"  {text!r:24} readtext {detect_ms:7.1f} ms -> recognize {recognize_ms:6.1f} ms "
+            f"({detect_ms / recognize_ms:.1f}x) read {detected!r} / {recognized!r}"
+        )
+
+
+OCR_REGIONS = ["YEAR_REGION", "TURN_REGION", "FAILURE_REGION", "CRITERIA_REGION", "SKILL_PTS_REGION"]
+
+
+def reference_enhance(rgb: np.ndarray) -> np.ndarray:
+    """The former PIL enhancement of enhanced_screenshot"""
+    pil_img = Image.fromarray(rgb)
+    pil_img = pil_img.resize((pil_img.width * 2, pil_img.height * 2), Image.BICUBIC)
+    pil_img = pil_img.convert("L")
+    return np.asarray(ImageEnhance.Contrast(pil_img).enhance(1.5))
+
+
+def render_crop(text: str, rng, width: int = 65, height: int = 22) -> np.ndarray:
+    """Unenhanced RGB HUD crop: dark text on a tinted light background"""
+    background = [int(c) for c in rng.integers(200, 250, 3)]
+    crop = np.empty((height, width, 3), np.uint8)
+    crop[:] = background
+    crop = cv2.subtract(crop, rng.integers(0, 20, crop.shape, dtype=np.uint8))
+    cv2.putText(crop, text, (2, height - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (40, 40, 50), 1, cv2.LINE_AA)
+    return crop
+
+
+def benchmark_preprocess(args):
+    rng = np.random.default_rng(0)
+    if args.frames:
+        regions = get_regions_for_mode()
+        crops = []
+        for path in sorted(glob.glob(os.path.join(args.frames, "*.png"))):
+            rgb = cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)
+            crops += [(crop_region(rgb, regions[name]), None) for name in OCR_REGIONS]
+        print(f"[BENCH] {len(crops)} OCR crops from the frames in {args.frames}")
+    else:
+        crops = []
+        for _ in range(args.synthetic):
+            value = int(rng.integers(0, 1200))
+            text = f"{value}%" if rng.random() < 0.3 else str(value)
+            crops.append((render_crop(text, rng), text))
+        print(f"[BENCH] {len(crops)} synthetic HUD crops")
+
+    identical = 0
+    differences, old_times, new_times = [], [], []
+    out = None
+    for rgb, _ in crops:
+        old = reference_enhance(rgb)
+        out = enhance_for_ocr(rgb, out=out)
+        identical += np.array_equal(old, out)
+        differences.append(np.abs(old.astype(np.int16) - out).mean())
+        old_times.append(time_calls(lambda: reference_enhance(rgb), args.iterations))
+        new_times.append(time_calls(lambda: enhance_for_ocr(rgb, out=out), args.iterations))
+    print(
+        f"[BENCH] Byte-identical on {identical}/{len(crops)} crops, "
+        f"mean abs difference {np.mean(differences):.2f} gray levels"
+    )
+    print(
+        f"[BENCH] Per crop: PIL {np.median(old_times) * 1000:.1f} us, "
+        f"OpenCV {np.median(new_times) * 1000:.1f} us (median)"
+    )
+
+    # Glyph bank cut from PIL enhanced crops, like the ones users extracted
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "field.png")
+        cv2.imwrite(path, reference_enhance(render_crop("0 1 2 3 4 5 6 7 8 9 %", rng, width=180)))
+        extract_glyphs(path, "0123456789%", os.path.join(folder, "digits"))
+        reader = DigitReader(os.path.join(folder, "digits"))
+    readers = {"glyphs": lambda gray: str(reader.read_number(gray, whole=False)[0])}
+    if args.ocr:
+        from core.ocr_worker import load_recognizer
+
+        ocr = load_recognizer()
+        readers["ocr"] = lambda gray: " ".join(item[1] for item in ocr.recognize(gray))
+
+    for name, read in readers.items():
+        same = old_right = new_right = 0
+        for rgb, text in crops:
+            old, new = read(reference_enhance(rgb)), read(enhance_for_ocr(rgb))
+            same += old == new
+            if text is not None:
+                expected = text.rstrip("%") if name == "glyphs" else text
+                old_right += old == expected
+                new_right += new == expected
+            if old != new and args.verbose:
+                print(f"  {name}: PIL {old!r}, OpenCV {new!r}, expected {text!r}")
+        line = f"[BENCH] {name}: same text on {same}/{len(crops)} crops"
+        if crops[0][1] is not None:
+            line += f", right on {old_right} (PIL) / {new_right} (OpenCV)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro benchmarks for the bot's hot paths")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    adb_parser = subparsers.add_parser(
+        "adb", help="ADB controller round trips (fake adb server unless --real)"
+    )
+    adb_parser.add_argument("--serial", default="127.0.0.1:16384")
+    adb_parser.add_argument("--iterations", type=int, default=50)
+    adb_parser.add_argument(
+        "--real", action="store_true", help="Use the local adb server and device"
+    )
+    adb_parser.set_defaults(func=benchmark_adb)
+
+    pyramid_parser = subparsers.add_parser(
+        "pyramid", help="Pyramid matcher parity and speed against full-scale matching"
+    )
+    pyramid_parser.add_argument(
+        "--frames", help="Folder of phone screenshots (PNG), synthetic frames if omitted"
+    )
+    pyramid_parser.add_argument("--synthetic", type=int, default=20)
+    pyramid_parser.add_argument("--iterations", type=int, default=5)
+    pyramid_parser.set_defaults(func=benchmark_pyramid)
+
+    nms_parser = subparsers.add_parser(
+        "nms", help="Vectorized box suppression against the former Python loops"
+    )
+    nms_parser.add_argument(
+        "--thresholds", type=float, nargs="+", default=[0.65, 0.73, 0.85]
+    )
+    nms_parser.add_argument(
+        "--nms-points", type=int, default=3000, help="Points fed to non_maximum_suppression"
+    )
+    nms_parser.add_argument("--iterations", type=int, default=3)
+    nms_parser.set_defaults(func=benchmark_nms)
+
+    support_parser = subparsers.add_parser(
+        "support", help="Color support card classifier parity and speed against templates"
+    )
+    support_parser.add_argument(
+        "--frames", help="Folder of training screenshots (PNG), synthetic frames if omitted"
+    )
+    support_parser.add_argument("--synthetic", type=int, default=30)
+    support_parser.add_argument("--threshold", type=float, default=0.67)
+    support_parser.add_argument("--iterations", type=int, default=20)
+    support_parser.add_argument("--verbose", action="store_true", help="Print every disagreement")
+    support_parser.set_defaults(func=benchmark_support)
+
+    digits_parser = subparsers.add_parser(
+        "digits", help="Glyph digit reader accuracy and speed on rendered HUD fields"
+    )
+    digits_parser.add_argument(
+        "--bank", help="Glyph folder (e.g. assets/digits), a rendered bank if omitted"
+    )
+    digits_parser.add_argument("--fields", type=int, default=200)
+    digits_parser.add_argument("--ocr-fields", type=int, default=20)
+    digits_parser.add_argument("--iterations", type=int, default=20)
+    digits_parser.set_defaults(func=benchmark_digits)
+
+    ocr_parser = subparsers.add_parser(
+        "ocr", help="Per-field OCR latency with and without the text detector"
+    )
+    ocr_parser.add_argument("--iterations", type=int, default=5)
+    ocr_parser.set_defaults(func=benchmark_ocr)
+
+    preprocess_parser = subparsers.add_parser(
+        "preprocess", help="OpenCV OCR crop enhancement against the former PIL one"
+    )
+    preprocess_parser.add_argument(
+        "--frames", help="Folder of phone screenshots (PNG), synthetic crops if omitted"
+    )
+    preprocess_parser.add_argument("--synthetic", type=int, default=200)
+    preprocess_parser.add_argument("--iterations", type=int, default=50)
+    preprocess_parser.add_argument(
+        "--ocr", action="store_true", help="Also compare the texts read by EasyOCR"
+    )
+    preprocess_parser.add_argument("--verbose", action="store_true", help="Print every difference")
+    preprocess_parser.set_defaults(func=benchmark_preprocess)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
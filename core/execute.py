@@ -1,6 +1,7 @@
 import os
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import pyautogui
@@ -9,7 +10,8 @@ import numpy as np
 
 from core.state import (
     check_support_card,
-    check_failure,
+    capture_failure,
+    check_failures,
     check_turn,
     check_mood,
     check_current_year,
@@ -24,6 +26,7 @@ from core.logic import (
     MAX_FAILURE,
 )
 from core.recognizer import is_infirmary_active, match_template
+from core.ocr import submit_ocr
 from utils.constants import MOOD_LIST
 from utils.adb_utils import (
     adb_click,
@@ -35,7 +38,14 @@ from utils.adb_utils import (
     check_mumu_resolution,
     get_adb_controller,
 )
-from utils.image_recognition import locate_center_on_screen, locate_on_screen
+from utils.image_recognition import (
+    detect_templates,
+    locate_center_on_screen,
+    locate_on_screen,
+)
+from utils.capture import snapshot_frame, wait_for_stable_frame
+from utils.constants import get_regions_for_mode
+from utils.screen_classifier import classify_screen
 from utils.scenario import ura
 
 pyautogui.useImageNotFoundException(False)
@@ -100,58 +110,97 @@ training_types = {
 }
 
 
+# Buttons probed on every career_lobby iteration: name -> (template, confidence)
+LOBBY_BUTTONS = {
+    "event_choice": ("assets/icons/event_choice_1.png", 0.9),
+    "inspiration": ("assets/buttons/inspiration_btn.png", 0.65),
+    "next": ("assets/buttons/next_btn.png", 0.8 if not USE_PHONE else 0.7),
+    "next_aoharu": ("assets/buttons/next_btn_aoharu.png", 0.8 if not USE_PHONE else 0.7),
+    "cancel": ("assets/buttons/cancel_btn.png", 0.8 if not USE_PHONE else 0.7),
+    "aoharu_run": ("assets/buttons/aoharu_run_btn.png", 0.75),
+    "tazuna": ("assets/ui/tazuna_hint.png", 0.8),
+}
+
+# Lobby buttons worth looking for on each screen type of the screen index
+# (see utils/screen_classifier.py). Unknown screens get every button.
+SCREEN_BUTTONS = {
+    "lobby": ["inspiration", "tazuna"],
+    "event": ["event_choice"],
+    "race_result": ["next", "next_aoharu", "cancel"],
+    "race_list": ["cancel"],
+    "training": ["cancel"],
+    "dialog": ["cancel", "next"],
+    "aoharu_team": ["next_aoharu", "cancel"],
+    "aoharu_showdown": ["aoharu_run"],
+}
+# Screens whose year / event name are read from the top bar
+YEAR_SCREENS = ("lobby", "event")
+EVENT_SCREENS = ("event",)
+
+
 def get_config():
     return config
 
 
-def click(img, confidence=0.8, minSearch=0.2, click=1, text="", name=None):
+def click(img, confidence=0.8, minSearch=0.2, click=1, text="", name=None, frame=None):
     btn = locate_center_on_screen(
-        img, confidence=confidence, min_search_time=minSearch, name=name
+        img, confidence=confidence, min_search_time=minSearch, name=name, frame=frame
     )
     if btn:
-        if text:
-            print(text)
+        return click_at(btn, click=click, text=text)
 
-        # Check if usePhone is enabled in config
-        if USE_PHONE:
-            # Use ADB for phone emulation
-            # Auto-detect Mumu if not already connected
-            if not get_adb_controller().is_connected():
-                print("[INFO] Auto-detecting Mumu instance...")
-                auto_connect_mumu()
-
-                # Check resolution for phone mode
-                print("[INFO] Checking Mumu resolution...")
-                if not check_mumu_resolution(720, 1280):
-                    print(
-                        "[WARNING] Mumu resolution is not 720x1280. This may cause issues."
-                    )
-                    print(
-                        "[INFO] Please set Mumu resolution to 720x1280 for optimal performance."
-                    )
+    return False
 
-            for i in range(click):
-                adb_move_to(btn.x, btn.y, duration=0.175)
-                adb_click(btn.x, btn.y)
-                if i < click - 1:  # Add interval between multiple clicks
-                    time.sleep(0.1)
-        else:
-            # Use regular pyautogui
-            pyautogui.moveTo(btn, duration=0.175)
-            pyautogui.click(clicks=click)
 
-        return True
+def click_at(btn, click=1, text=""):
+    """Click an already located button (anything with x and y)"""
+    if text:
+        print(text)
 
-    return False
+    # Check if usePhone is enabled in config
+    if USE_PHONE:
+        # Use ADB for phone emulation
+        # Auto-detect Mumu if not already connected
+        if not get_adb_controller().is_connected():
+            print("[INFO] Auto-detecting Mumu instance...")
+            auto_connect_mumu()
+
+            # Check resolution for phone mode
+            print("[INFO] Checking Mumu resolution...")
+            if not check_mumu_resolution(720, 1280):
+                print(
+                    "[WARNING] Mumu resolution is not 720x1280. This may cause issues."
+                )
+                print(
+                    "[INFO] Please set Mumu resolution to 720x1280 for optimal performance."
+                )
 
+        for i in range(click):
+            adb_move_to(btn.x, btn.y, duration=0.175)
+            adb_click(btn.x, btn.y)
+            if i < click - 1:  # Add interval between multiple clicks
+                time.sleep(0.1)
+    else:
+        # Use regular pyautogui
+        pyautogui.moveTo(btn.x, btn.y, duration=0.175)
+        pyautogui.click(clicks=click)
+
+    return True
+
+
+def click_event_choice(
+    choice_number, minSearch=0.2, confidence=0.8, frame=None, btn=None
+):
+    """Special function for clicking event choices with higher confidence to avoid confusion.
 
-def click_event_choice(choice_number, minSearch=0.2, confidence=0.8):
-    """Special function for clicking event choices with higher confidence to avoid confusion"""
+    `btn` can pass an already detected event_choice_1 location to skip the search.
+    """
     img_path = f"assets/icons/event_choice_1.png"
     # Use higher confidence for event choices to avoid confusion between similar images
-    btn = locate_center_on_screen(
-        img_path, confidence=confidence, min_search_time=minSearch
-    )
+    if btn is None:
+        btn = locate_center_on_screen(
+            img_path, confidence=confidence, min_search_time=minSearch, frame=frame
+        )
     if btn:
         print(
             f"[INFO] Event choice 1 found: {btn}, selecting option choice {choice_number} below it"
@@ -213,69 +262,154 @@ def click_guts_button():
         return False
 
 
+# Training previews are analyzed in the background while the next one is
+# captured. The failure crops are read together in one OCR pass on
+# the OCR threads.
+_analysis_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="training")
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+
+def locate_training_icons(keys=None):
+    """Locate the training icons of `keys` (all by default), with their _2/_3
+    variants, on one screen.
+
+    All variants are matched in parallel; per training the first variant
+    found wins, like the sequential fallbacks. Trainings missing from that
+    screen are searched again one variant at a time, with retries.
+    """
+    confidence = 0.8 if not USE_PHONE else 0.65
+    suffixes = ("", "_2", "_3")
+    types = {key: training_types[key] for key in (keys or training_types)}
+    variants = {
+        (key, suffix): (icon_path.replace(".png", f"{suffix}.png"), confidence)
+        for key, icon_path in types.items()
+        for suffix in suffixes
+        if os.path.exists(icon_path.replace(".png", f"{suffix}.png"))
+    }
+    found = detect_templates(variants)
+
+    positions = {}
+    for key, icon_path in types.items():
+        pos = next(
+            (found[(key, suffix)] for suffix in suffixes if found.get((key, suffix))),
+            None,
+        )
+        for suffix in suffixes:
+            if pos:
+                break
+            pos = locate_center_on_screen(
+                icon_path.replace(".png", f"{suffix}.png"),
+                confidence=confidence,
+                name=key if not suffix else None,
+            )
+        positions[key] = pos
+    return positions
+
+
+def analyze_training(key, frame=None):
+    """Count support cards of one training preview.
+
+    Returns (result, timings) where timings holds the seconds each stage
+    took. The failure chance is read later for all previews at once.
+    """
+    (support_counts, support_secondary_counts), support_time = _timed(
+        check_support_card, frame=frame
+    )
+
+    total_support = sum(support_counts.values())
+    result = {
+        "support": support_counts,
+        "total_support": total_support,
+    }
+    # count total support
+    if SCENARIO == 2:
+        result["spirit"] = support_secondary_counts.get("spirit", 0)
+        result["spirit-bomb"] = support_secondary_counts.get("spirit-bomb", 0)
+
+    return result, {"support": support_time}
+
+
+def print_training_result(key, result):
+    if SCENARIO == 2:
+        print(
+            f"[{key.upper()}] → {result['support']}, Spirit: {result['spirit']}, Spirit Bomb: {result['spirit-bomb']}, Fail: {result['failure']}%"
+        )
+    else:
+        print(f"[{key.upper()}] → {result['support']}, Fail: {result['failure']}%")
+
+
 def check_training():
+    """Scan every training preview.
+
+    On phone the scan is pipelined: once training N's preview is captured
+    its analysis runs in the background while the input for training N+1 is
+    sent and its preview captured. The failure chances of all previews are
+    read in one OCR pass once every preview has been captured.
+    """
     results = {}
     last_mouse_pos = None
+    scan_start = time.perf_counter()
+    timings = {}
+    pending = {}
+    failure_crops = {}
 
     ### move to guts training first
     click_guts_button()
 
-    for key, icon_path in training_types.items():
-        pos = locate_center_on_screen(
-            icon_path, confidence=0.8 if not USE_PHONE else 0.65, name=key
-        )
-
-        # Check for second icon option if first one is not found
-        if not pos:
-            pos = locate_center_on_screen(
-                icon_path.replace(".png", "_2.png"),
-                confidence=0.8 if not USE_PHONE else 0.65,
-            )
-
-        # Check for third icon option if second one is not found
-        if not pos:
-            pos = locate_center_on_screen(
-                icon_path.replace(".png", "_3.png"),
-                confidence=0.8 if not USE_PHONE else 0.65,
-            )
+    regions = get_regions_for_mode()
+    # The preview must settle where both the support icons and the failure
+    # chance are read
+    preview_regions = [regions["SUPPORT_CARD_ICON_REGION"], regions["FAILURE_REGION"]]
+    for key in training_types:
+        # Located on the screen as it is now, the tab row can shift while a
+        # preview is open
+        pos = locate_training_icons([key])[key]
 
         # click the training icon
         if pos:
+            stage_start = time.perf_counter()
             if USE_PHONE:
                 adb_mouse_down(pos.x, pos.y)
                 last_mouse_pos = (pos.x, pos.y)
             else:
-                pyautogui.moveTo(pos, duration=0.1)
+                pyautogui.moveTo(pos.x, pos.y, duration=0.1)
                 pyautogui.mouseDown()
+            timings[key] = {"input": time.perf_counter() - stage_start}
 
-            # Check support card
-            support_counts, support_secondary_counts = check_support_card()
-            total_support = sum(support_counts.values())
-            failure_chance = check_failure(name=key)
-
-            # count total support
-            if SCENARIO == 2:
-                count_spirit = support_secondary_counts.get("spirit", 0)
-                count_spirit_bomb = support_secondary_counts.get("spirit-bomb", 0)
-                results[key] = {
-                    "support": support_counts,
-                    "total_support": total_support,
-                    "spirit": count_spirit,
-                    "spirit-bomb": count_spirit_bomb,
-                    "failure": failure_chance,
-                }
-                print(
-                    f"[{key.upper()}] → {support_counts}, Spirit: {count_spirit}, Spirit Bomb: {count_spirit_bomb}, Fail: {failure_chance}%"
-                )
-                time.sleep(0.1)
+            if USE_PHONE:
+                # Capture this preview, then move on while it is analyzed
+                stage_start = time.perf_counter()
+                frame = wait_for_stable_frame(preview_regions)
+                failure_crops[key] = capture_failure(key, frame=frame)
+                timings[key]["capture"] = time.perf_counter() - stage_start
+                pending[key] = _analysis_pool.submit(analyze_training, key, frame)
             else:
-                results[key] = {
-                    "support": support_counts,
-                    "total_support": total_support,
-                    "failure": failure_chance,
-                }
-                print(f"[{key.upper()}] → {support_counts}, Fail: {failure_chance}%")
+                # Desktop reads the live screen, so analyze before moving on.
+                # No frames to compare there: give the preview the fixed
+                # settle time, and crop the failure chance once the support
+                # icons were read, like the scan always did.
                 time.sleep(0.1)
+                results[key], stage_timings = analyze_training(key)
+                timings[key].update(stage_timings)
+                stage_start = time.perf_counter()
+                failure_crops[key] = capture_failure(key)
+                timings[key]["capture"] = time.perf_counter() - stage_start
+
+    # Read every failure chance at once while the last previews are analyzed
+    failure_job = submit_ocr(_timed, check_failures, failure_crops)
+    for key, job in pending.items():
+        results[key], stage_timings = job.result()
+        timings[key].update(stage_timings)
+    failures, failure_time = failure_job.result()
+    results = {key: results[key] for key in training_types if key in results}
+    for key, result in results.items():
+        result["failure"] = failures.get(key, -1)
+        print_training_result(key, result)
 
     if USE_PHONE:
         # For ADB, release the mouse at the last position where it was pressed
@@ -287,10 +421,28 @@ def check_training():
     else:
         pyautogui.mouseUp()
 
+    print_training_timings(timings, time.perf_counter() - scan_start, failure_time)
     click(img="assets/buttons/back_btn.png")
     return results
 
 
+def print_training_timings(timings, elapsed, failure_time=0.0):
+    """Print per-stage seconds of a training scan and how much of it overlapped"""
+    stages = ("input", "capture", "support")
+    for key, stage_timings in timings.items():
+        details = ", ".join(
+            f"{stage} {stage_timings[stage]:.2f}s" for stage in stages if stage in stage_timings
+        )
+        print(f"[TIMING] {key}: {details}")
+    print(f"[TIMING] failure OCR: {failure_time:.2f}s")
+    total = sum(sum(stage_timings.values()) for stage_timings in timings.values())
+    total += failure_time
+    print(
+        f"[TIMING] Training scan took {elapsed:.2f}s for {total:.2f}s of stage work "
+        f"({max(total - elapsed, 0):.2f}s overlapped)"
+    )
+
+
 def do_train(train):
     if USE_PHONE:
         train_btn = locate_center_on_screen(
@@ -565,9 +717,9 @@ def race_select(prioritize_g1=False):
     if prioritize_g1:
         print("[INFO] Looking for G1 race.")
         for i in range(2):
-            race_card = match_template("assets/ui/g1_race.png", threshold=0.85).get(
-                "primary"
-            )
+            race_card = match_template(
+                "assets/ui/g1_race.png", threshold=0.85, pyramid=True
+            ).get("primary")
             print(f"[INFO] Race card found: {race_card}")
             if race_card:
                 for x, y, w, h in race_card:
@@ -581,6 +733,7 @@ def race_select(prioritize_g1=False):
                         confidence=0.7,
                         min_search_time=0.7,
                         region=region,
+                        pyramid=True,
                     )
 
                     # Debug: Save images with region information
@@ -627,7 +780,10 @@ def race_select(prioritize_g1=False):
             # debug_screenshot = get_screenshot_for_debug()
 
             match_aptitude = locate_center_on_screen(
-                "assets/ui/match_track.png", confidence=0.8, min_search_time=0.7
+                "assets/ui/match_track.png",
+                confidence=0.8,
+                min_search_time=0.7,
+                pyramid=True,
             )
 
             # Debug: Save images without region (full screen search)
@@ -754,72 +910,97 @@ def career_lobby():
         # Check failure threshold at the start of each loop iteration
         check_failure_threshold()
 
-        year = check_current_year()
-        event_name = check_event_name()
-
-        print(f"[INFO] Event Name: {event_name}")
+        # A new capture every pass, so a screen in transition is seen again
+        # once it moved on. It serves every read of this screen until an
+        # input is sent.
+        frame = snapshot_frame(max_age=0)
+
+        # Only look for the buttons of the recognized screen. When none of
+        # them is there the screen was misread, so check everything.
+        screen = classify_screen(frame)
+        lobby_buttons = {}
+        if screen in SCREEN_BUTTONS:
+            lobby_buttons = detect_templates(
+                {name: LOBBY_BUTTONS[name] for name in SCREEN_BUTTONS[screen]},
+                frame=frame,
+            )
+            if not any(lobby_buttons.values()):
+                screen = None
+        else:
+            screen = None
+        if screen is None:
+            lobby_buttons = detect_templates(LOBBY_BUTTONS, frame=frame)
+        lobby_buttons = {name: lobby_buttons.get(name) for name in LOBBY_BUTTONS}
+        event_choice_btn = lobby_buttons["event_choice"]
+
+        # Year and event name are read side by side on the OCR threads
+        year_job = event_job = None
+        if screen in (None,) + YEAR_SCREENS:
+            year_job = submit_ocr(check_current_year, frame=frame)
+        if screen in (None,) + EVENT_SCREENS:
+            event_job = submit_ocr(check_event_name, frame=frame)
+        year = year_job.result() if year_job else ""
+        event_name = ""
+        if event_job:
+            event_name = event_job.result()
+            print(f"[INFO] Event Name: {event_name}")
 
         ## First check, event
         if (
             year == "Classic Year Early Jan" and not NEW_YEAR_EVENT_DONE
         ):  # 2nd New Year Event for energy
             print("[ACTION] Checking for 2nd New Year Event for energy")
-            if click_event_choice(2, minSearch=1, confidence=0.9):
+            if event_choice_btn and click_event_choice(2, btn=event_choice_btn):
                 print("[ACTION] Clicking choice 2 for 2nd New Year Event for energy")
                 NEW_YEAR_EVENT_DONE = True
                 continue
             else:
-                if click_event_choice(1, minSearch=0.2, confidence=0.9):
+                if event_choice_btn and click_event_choice(1, btn=event_choice_btn):
                     print(
                         "[ACTION] Cannot find 2nd New Year Event for energy, clicking choice 1"
                     )
                     NEW_YEAR_EVENT_DONE = True
                     continue
         else:
+            # The detected buttons are stale once a choice was clicked, so the
+            # next pass detects again instead of also clicking choice 1
+            clicked = False
             for predefine_event_name, predefine_event_data in predefined_events.items():
                 if predefine_event_data["key"].lower() in event_name.lower():
                     print(
                         f"[ACTION] '{predefine_event_name}' event found, clicking choice {predefine_event_data['choice']}"
                     )
-                    if click_event_choice(
-                        predefine_event_data["choice"], minSearch=0.1, confidence=0.9
+                    if event_choice_btn and click_event_choice(
+                        predefine_event_data["choice"], btn=event_choice_btn
                     ):
                         print(
                             f"[ACTION] Clicked choice {predefine_event_data['choice']}"
                         )
-                        continue
+                        clicked = True
+                        break
+            if clicked:
+                continue
 
-            if click_event_choice(1, minSearch=0.1, confidence=0.9):
+            if event_choice_btn and click_event_choice(1, btn=event_choice_btn):
                 print("[ACTION] Clicked choice 1")
                 continue
 
         ### Second check, inspiration
-        if click(
-            img="assets/buttons/inspiration_btn.png",
-            minSearch=0.2,
-            text="[INFO] Inspiration found.",
-            confidence=0.65,
+        if lobby_buttons["inspiration"] and click_at(
+            lobby_buttons["inspiration"], text="[INFO] Inspiration found."
         ):
             # Reset failure count
             FAILURE_COUNT = 0
             continue
 
         ### Third check, next button
-        if click(
-            img="assets/buttons/next_btn.png",
-            minSearch=0.2,
-            confidence=0.8 if not USE_PHONE else 0.7,
-        ):
+        if lobby_buttons["next"] and click_at(lobby_buttons["next"]):
             adb_click(360, 250)
             print("[INFO] Normal next button found, clicking...")
             FAILURE_COUNT += 1
             continue
         
-        if click(
-            img="assets/buttons/next_btn_aoharu.png",
-            minSearch=0.2,
-            confidence=0.8 if not USE_PHONE else 0.7,
-        ):
+        if lobby_buttons["next_aoharu"] and click_at(lobby_buttons["next_aoharu"]):
             if not FIRST_TEAM_CHECKED:
                 cancel_btn = locate_center_on_screen(
                     template_path="assets/buttons/cancel_btn.png",
@@ -835,23 +1016,15 @@ def career_lobby():
             continue
 
         ### Fourth check, cancel button
-        if click(
-            img="assets/buttons/cancel_btn.png",
-            minSearch=0.2,
-            confidence=0.8 if not USE_PHONE else 0.7,
-        ):
+        if lobby_buttons["cancel"] and click_at(lobby_buttons["cancel"]):
             continue
 
         ### Fifth check, special scenes for Scenarios
+        aoharu_run_btn = None
         if SCENARIO != 1:
             # AOHARU SCENARIO
             # Click run button for team showdown
-            aoharu_run_btn = locate_center_on_screen(
-                "assets/buttons/aoharu_run_btn.png",
-                confidence=0.75,
-                name="aoharu_run_btn",
-                debug=False,
-            )
+            aoharu_run_btn = lobby_buttons["aoharu_run"]
 
             if aoharu_run_btn:
                 print("[INFO] Aoharu Scenario: Team showdown run detected")
@@ -929,29 +1102,40 @@ def career_lobby():
                 FAILURE_COUNT = 0
 
         ### Check if current menu is in career lobby
-        tazuna_hint = locate_center_on_screen(
-            "assets/ui/tazuna_hint.png",
-            confidence=0.8,
-            min_search_time=0.2,
-            name="tazuna",
-        )
+        tazuna_hint = lobby_buttons["tazuna"]
+        if aoharu_run_btn:
+            # The team showdown changed the screen since the batch detection
+            tazuna_hint = locate_center_on_screen(
+                "assets/ui/tazuna_hint.png",
+                confidence=0.8,
+                min_search_time=0.2,
+                name="tazuna",
+            )
 
         if tazuna_hint is None:
             print("[INFO] Should be in career lobby.")
             FAILURE_COUNT += 1
+            # Give the screen the time the former 0.2s search window did
+            # before looking again
+            time.sleep(0.2)
             continue
 
         time.sleep(0.5)
 
+        # Lobby reads below share one capture taken after the screen settled
+        frame = snapshot_frame(max_age=0)
+
         ### Check if there is debuff status
         debuffed = locate_on_screen(
             "assets/buttons/infirmary_btn2.png",
             confidence=0.8 if not USE_PHONE else 0.7,
             min_search_time=1,
+            frame=frame,
         )
         if debuffed:
             if is_infirmary_active(
-                (debuffed.left, debuffed.top, debuffed.width, debuffed.height)
+                (debuffed.left, debuffed.top, debuffed.width, debuffed.height),
+                frame=frame,
             ):
                 if USE_PHONE:
                     adb_click(debuffed.x, debuffed.y)
@@ -960,11 +1144,14 @@ def career_lobby():
                 print("[INFO] Character has debuff, go to infirmary instead.")
                 continue
 
-        mood = check_mood()
+        mood_job = submit_ocr(check_mood, frame=frame)
+        criteria_job = submit_ocr(check_criteria, frame=frame)
+        turn_job = submit_ocr(check_turn, frame=frame)
+        mood = mood_job.result()
         mood_index = MOOD_LIST.index(mood)
         minimum_mood = MOOD_LIST.index(MINIMUM_MOOD)
-        criteria = check_criteria()
-        turn = check_turn()
+        criteria = criteria_job.result()
+        turn = turn_job.result()
 
         print(
             "\n=======================================================================================\n"
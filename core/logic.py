@@ -2,6 +2,7 @@ import json
 import time
 
 from core.state import check_current_year, stat_state
+from core.ocr import submit_ocr
 from utils.image_recognition import locate_center_on_screen
 
 with open("config.json", "r", encoding="utf-8") as file:
@@ -215,8 +216,10 @@ def filter_by_stat_caps(results, current_stats):
 
 # Decide training (with race prioritization)
 def do_something(results):
-    year = check_current_year()
-    current_stats = stat_state()
+    year_job = submit_ocr(check_current_year)
+    stats_job = submit_ocr(stat_state)
+    year = year_job.result()
+    current_stats = stats_job.result()
     print(f"Current stats: {current_stats}")
 
     if results:
@@ -321,8 +324,10 @@ def do_something(results):
 
 # Decide training (without race prioritization - fallback)
 def do_something_fallback(results):
-    year = check_current_year()
-    current_stats = stat_state()
+    year_job = submit_ocr(check_current_year)
+    stats_job = submit_ocr(stat_state)
+    year = year_job.result()
+    current_stats = stats_job.result()
     print(f"Current stats: {current_stats}")
 
     if results:
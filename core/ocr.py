@@ -1,17 +1,176 @@
-import easyocr
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 from PIL import Image
 import numpy as np
 
-reader = easyocr.Reader(["en"], gpu=False)
+from utils.ocr_cache import get_ocr_cache, image_key
+from core.ocr_service import OCR_WORKERS, disable_ocr_service, get_ocr_service, torch_threads
+from core.ocr_worker import load_recognizer
+
+# Load config
+try:
+  with open("config.json", "r", encoding="utf-8") as file:
+    config = json.load(file)
+except FileNotFoundError:
+  config = {}
+
+# Every OCR'd region is a fixed, tight crop, so by default the crop goes
+# straight to the recognizer and the text detector is only loaded when a
+# caller asks for detection. True runs the detector on every read.
+OCR_TEXT_DETECTION = config.get("ocrTextDetection", False)
+
+# The EasyOCR model takes seconds to import and load, so it is built on a
+# background thread (see start_ocr_warmup) instead of at import time.
+_reader = None
+_detector_ready = False
+_reader_ready = threading.Event()
+_reader_thread = None
+_reader_lock = threading.Lock()
+# Set once crashing OCR workers were replaced by a reader in this process
+_in_process_fallback = False
+# Held by every read in this process: the OCR threads after that fallback
+# and the engine calibration thread share the one reader.
+_recognize_lock = threading.Lock()
+DIGITS = "0123456789"
+# Threads that run OCR reads (capture, OCR and parsing) beside the bot loop,
+# one per OCR worker process. In process a single thread keeps the reader
+# from being used concurrently.
+_ocr_threads = ThreadPoolExecutor(max_workers=max(1, OCR_WORKERS), thread_name_prefix="ocr")
+
+def _load_reader():
+  global _reader, _detector_ready
+  try:
+    start = time.time()
+    reader = load_recognizer(torch_threads(), OCR_TEXT_DETECTION)
+    # One dummy read so the first real read does not pay for lazy setup
+    reader.recognize(np.zeros((32, 96), dtype=np.uint8))
+    _reader = reader
+    _detector_ready = OCR_TEXT_DETECTION
+    print(f"[OCR] Model ready in {time.time() - start:.1f}s")
+  except Exception as e:
+    print(f"[OCR] Failed to load OCR model: {e}")
+  finally:
+    _reader_ready.set()
+
+def start_ocr_warmup():
+  """Start loading and warming up the OCR model in the background, once"""
+  global _reader_thread
+  service = get_ocr_service()
+  with _reader_lock:
+    if _reader_thread is not None:
+      return
+    if service is not None:
+      # The worker processes each load their own reader
+      _reader_thread = threading.current_thread()
+      service.warm_up()
+    else:
+      _reader_thread = threading.Thread(target=_load_reader, name="ocr-warmup", daemon=True)
+      _reader_thread.start()
+
+def get_reader():
+  """Return the OCR reader, waiting only if the warm-up is still running"""
+  start_ocr_warmup()
+  if not _reader_ready.is_set():
+    print("[OCR] Waiting for the OCR model to finish loading...")
+    _reader_ready.wait()
+  if _reader is None:
+    raise RuntimeError("OCR model is not available")
+  return _reader
+
+def get_detector_reader():
+  """Return the OCR reader with its text detector, loading the detector the
+  first time one is needed"""
+  global _detector_ready
+  reader = get_reader()
+  with _reader_lock:
+    if not _detector_ready:
+      start = time.time()
+      reader.setDetector("craft")
+      _detector_ready = True
+      print(f"[OCR] Text detector loaded in {time.time() - start:.1f}s")
+  return reader
 
-def extract_text(pil_img: Image.Image) -> str:
-  img_np = np.array(pil_img)
-  result = reader.readtext(img_np)
-  texts = [text[1] for text in result]
-  return " ".join(texts)
+def _fall_back_in_process():
+  """Stop the OCR workers after they kept crashing and load the reader in
+  this process instead"""
+  global _reader_thread, _in_process_fallback
+  disable_ocr_service()
+  with _reader_lock:
+    if _in_process_fallback:
+      return
+    _in_process_fallback = True
+    print("[OCR] OCR workers keep crashing, reading in the bot's process from now on")
+    _reader_thread = threading.Thread(target=_load_reader, name="ocr-warmup", daemon=True)
+    _reader_thread.start()
+
+def _run_ocr(img_np, boxes=None, detect=False, **params):
+  """EasyOCR results for an image. Without detection, `boxes` (x_min, x_max,
+  y_min, y_max) are passed straight to the recognizer, the whole image when
+  omitted."""
+  service = get_ocr_service()
+  if service is not None:
+    try:
+      return service.read(img_np, boxes=boxes, detect=detect or OCR_TEXT_DETECTION, **params)
+    except BrokenProcessPool:
+      _fall_back_in_process()
+  with _recognize_lock:
+    if detect or OCR_TEXT_DETECTION:
+      return get_detector_reader().readtext(img_np, **params)
+    if boxes is None:
+      boxes = [[0, img_np.shape[1], 0, img_np.shape[0]]]
+    return get_reader().recognize(img_np, horizontal_list=boxes, free_list=[], **params)
+
+def _read_text(img_np, detect=False, **params) -> str:
+  """Run OCR on an image, answering repeated reads of the same pixels from
+  the OCR cache"""
+  cache = get_ocr_cache()
+  key = image_key(img_np, detect=detect, **params) if cache is not None else None
+  if key is not None:
+    text = cache.get(key)
+    if text is not None:
+      return text
+
+  result = _run_ocr(img_np, detect=detect, **params)
+  text = " ".join(item[1] for item in result)
+  if key is not None:
+    cache.put(key, text)
+  return text
+
+def extract_text(pil_img: Image.Image, detect: bool = False) -> str:
+  """Read the text of a crop. Pass detect=True when the text's position in
+  the crop is not known, to locate it with the text detector first."""
+  img_np = np.asarray(pil_img)
+  return _read_text(img_np, detect=detect)
 
 def extract_number(pil_img: Image.Image) -> int:
-  img_np = np.array(pil_img)
-  result = reader.readtext(img_np, allowlist="0123456789")
-  texts = [text[1] for text in result]
-  return " ".join(texts)
+  img_np = np.asarray(pil_img)
+  return _read_text(img_np, allowlist=DIGITS)
+
+def extract_batch(pil_imgs, allowlists=None, cache=True) -> list:
+  """Read several crops, returning their texts in order.
+
+  `allowlists` gives one allowlist (or None) per crop. Every crop is a call
+  of its own: on CPU EasyOCR recognizes boxes one at a time whatever the
+  batch size, so stacking crops into one image saves nothing. `cache=False`
+  skips the OCR cache, for timing the model.
+  """
+  if allowlists is None:
+    allowlists = [None] * len(pil_imgs)
+  texts = []
+  for img, allowlist in zip(pil_imgs, allowlists):
+    img_np = np.asarray(img)
+    params = {"allowlist": allowlist} if allowlist else {}
+    if cache:
+      texts.append(_read_text(img_np, **params))
+    else:
+      texts.append(" ".join(item[1] for item in _run_ocr(img_np, **params)))
+  return texts
+
+def submit_ocr(fn, *args, **kwargs) -> Future:
+  """Run an OCR read such as check_event_name on the OCR threads and return
+  its future, so the bot can keep capturing and matching meanwhile"""
+  return _ocr_threads.submit(fn, *args, **kwargs)
@@ -0,0 +1,307 @@
+import os
+import sys
+import json
+import time
+import argparse
+import shutil
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from core.ocr import DIGITS, extract_batch
+from utils.digit_reader import get_digit_reader
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# Engine per field type, "auto" lets the startup calibration pick one:
+# "digits" (stats, skill points), "word" (mood), "text" (year, event names...)
+OCR_ENGINES = config.get("ocrEngines", {})
+TESSERACT_PATH = config.get("tesseractPath") or shutil.which("tesseract")
+# Sample crops the calibration reads: <field>/<crop>.png plus a labels.json
+# mapping each file name to the text it shows
+SAMPLES_DIR = os.path.join("assets", "ocr_samples")
+# Share of the samples an engine must read right to be picked
+ACCURACY_FLOOR = 0.9
+
+FIELD_ALLOWLISTS = {"digits": DIGITS, "word": None, "text": None}
+# Chains used until calibration finished, or when a field has no samples
+DEFAULT_CHAINS = {"digits": ["digits", "easyocr"], "word": ["easyocr"], "text": ["easyocr"]}
+
+
+class OCREngine(ABC):
+    """Reads a batch of grayscale or RGB crops.
+
+    read_batch returns one text per crop, None where the engine could not
+    read it confidently so the next engine of the field's chain is tried.
+    `cache=False` skips any result cache, for timing the engine.
+    """
+
+    name = ""
+    fields = tuple(FIELD_ALLOWLISTS)
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    def read_batch(
+        self, images: List[np.ndarray], allowlist: Optional[str], cache: bool = True
+    ) -> List[Optional[str]]:
+        pass
+
+
+class EasyOCREngine(OCREngine):
+    """EasyOCR through the OCR cache and workers"""
+
+    name = "easyocr"
+
+    def read_batch(self, images, allowlist, cache=True):
+        return extract_batch(images, allowlists=[allowlist] * len(images), cache=cache)
+
+
+class TesseractEngine(OCREngine):
+    """A local tesseract binary, one process per crop, single text line mode"""
+
+    name = "tesseract"
+
+    def available(self) -> bool:
+        return bool(TESSERACT_PATH)
+
+    def read(self, image: np.ndarray, allowlist: Optional[str]) -> Optional[str]:
+        command = [TESSERACT_PATH, "stdin", "stdout", "--psm", "7"]
+        if allowlist:
+            command += ["-c", f"tessedit_char_whitelist={allowlist}"]
+        ok, png = cv2.imencode(".png", image)
+        if not ok:
+            return None
+        try:
+            output = subprocess.run(
+                command, input=png.tobytes(), capture_output=True, timeout=5, check=True
+            ).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"[OCR] tesseract failed: {e}")
+            return None
+        return " ".join(output.decode("utf-8", "replace").split()) or None
+
+    def read_batch(self, images, allowlist, cache=True):
+        return [self.read(image, allowlist) for image in images]
+
+
+class DigitEngine(OCREngine):
+    """The glyph template digit reader, numbers only"""
+
+    name = "digits"
+    fields = ("digits",)
+
+    def available(self) -> bool:
+        return get_digit_reader() is not None
+
+    def read_batch(self, images, allowlist, cache=True):
+        reader = get_digit_reader()
+        texts = []
+        for image in images:
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            value, _ = reader.read_number(gray)
+            texts.append(None if value is None else str(value))
+        return texts
+
+
+ENGINES: Dict[str, OCREngine] = {
+    engine.name: engine for engine in (EasyOCREngine(), TesseractEngine(), DigitEngine())
+}
+
+_chains: Dict[str, List[str]] = {}
+_calibration = None
+_calibration_lock = threading.Lock()
+
+
+def _chain(name: str) -> List[str]:
+    """An engine followed by EasyOCR, which reads what it cannot"""
+    return [name] if name == "easyocr" else [name, "easyocr"]
+
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").split()).lower()
+
+
+def load_samples(field: str, samples_dir: str = SAMPLES_DIR):
+    """(images, expected texts) of a field's calibration crops"""
+    folder = os.path.join(samples_dir, field)
+    try:
+        with open(os.path.join(folder, "labels.json"), "r", encoding="utf-8") as file:
+            labels = json.load(file)
+    except FileNotFoundError:
+        return [], []
+    images, expected = [], []
+    for filename, text in labels.items():
+        image = cv2.imread(os.path.join(folder, filename), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            print(f"[OCR] Could not read sample {filename}")
+            continue
+        images.append(image)
+        expected.append(text)
+    return images, expected
+
+
+def measure_engine(engine: OCREngine, field: str, images, expected):
+    """(accuracy, ms per crop) of an engine on a field's samples"""
+    allowlist = FIELD_ALLOWLISTS[field]
+    # One crop first so lazy setup is not timed
+    engine.read_batch(images[:1], allowlist, cache=False)
+    start = time.perf_counter()
+    texts = [engine.read_batch([image], allowlist, cache=False)[0] for image in images]
+    elapsed = (time.perf_counter() - start) * 1000 / len(images)
+    correct = sum(_normalize(text) == _normalize(text_expected) for text, text_expected in zip(texts, expected))
+    return correct / len(images), elapsed
+
+
+def calibrate(fields=tuple(FIELD_ALLOWLISTS), samples_dir: str = SAMPLES_DIR) -> Dict[str, List[str]]:
+    """Pick each "auto" field's engine: the fastest available one reading at
+    least ACCURACY_FLOOR of the field's samples right, else the most
+    accurate. EasyOCR stays last in the chain as the fallback."""
+    chains = {}
+    for field in fields:
+        choice = OCR_ENGINES.get(field, "auto")
+        if choice != "auto":
+            if choice not in ENGINES:
+                print(f"[OCR] Unknown OCR engine for {field} fields: {choice}")
+            chains[field] = _chain(choice)
+            continue
+        images, expected = load_samples(field, samples_dir)
+        if not images:
+            chains[field] = DEFAULT_CHAINS[field]
+            continue
+
+        scores = {}
+        for name, engine in ENGINES.items():
+            if field in engine.fields and engine.available():
+                scores[name] = measure_engine(engine, field, images, expected)
+                accuracy, elapsed = scores[name]
+                print(f"[OCR] {field}: {name} read {accuracy:.0%} of {len(images)} samples, {elapsed:.1f} ms each")
+        passing = [name for name, (accuracy, _) in scores.items() if accuracy >= ACCURACY_FLOOR]
+        if passing:
+            best = min(passing, key=lambda name: scores[name][1])
+        else:
+            best = max(scores, key=lambda name: scores[name][0])
+        chains[field] = _chain(best)
+        print(f"[OCR] {field} fields use {best}")
+    return chains
+
+
+def _run_calibration():
+    try:
+        _chains.update(calibrate())
+    except Exception as e:
+        print(f"[OCR] Engine calibration failed, using the default engines: {e}")
+
+
+def start_calibration():
+    """Calibrate the engines once, on a background thread. Samples go through
+    the OCR model one crop per call, so the bot's reads run between them
+    instead of waiting for the whole calibration. Reads use the default
+    chains until it is done."""
+    global _calibration
+    with _calibration_lock:
+        if _calibration is None:
+            _calibration = threading.Thread(
+                target=_run_calibration, name="ocr-calibration", daemon=True
+            )
+            _calibration.start()
+
+
+def engine_chain(field: str) -> List[str]:
+    """Engines tried in order for a field type"""
+    chain = _chains.get(field)
+    if chain is None:
+        choice = OCR_ENGINES.get(field, "auto")
+        chain = DEFAULT_CHAINS[field] if choice == "auto" else _chain(choice)
+    return [
+        name
+        for name in chain
+        if name in ENGINES and field in ENGINES[name].fields and ENGINES[name].available()
+    ]
+
+
+def read_fields(pil_imgs, field: str = "text") -> List[str]:
+    """Read crops of one field type, each engine of the field's chain taking
+    the crops the previous ones could not read"""
+    images = [np.asarray(img) for img in pil_imgs]
+    texts: List[Optional[str]] = [None] * len(images)
+    for name in engine_chain(field) or ["easyocr"]:
+        pending = [i for i, text in enumerate(texts) if text is None]
+        if not pending:
+            break
+        results = ENGINES[name].read_batch([images[i] for i in pending], FIELD_ALLOWLISTS[field])
+        for i, text in zip(pending, results):
+            texts[i] = text
+    return [text or "" for text in texts]
+
+
+def read_field(pil_img, field: str = "text") -> str:
+    """Read one crop of a field type"""
+    return read_fields([pil_img], field)[0]
+
+
+def add_sample(field: str, image_path: str, text: str, samples_dir: str = SAMPLES_DIR) -> str:
+    """Copy a crop showing `text` into a field's calibration samples"""
+    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError(f"Could not read {image_path}")
+    folder = os.path.join(samples_dir, field)
+    os.makedirs(folder, exist_ok=True)
+    labels_path = os.path.join(folder, "labels.json")
+    try:
+        with open(labels_path, "r", encoding="utf-8") as file:
+            labels = json.load(file)
+    except FileNotFoundError:
+        labels = {}
+    filename = f"{len(labels) + 1}.png"
+    cv2.imwrite(os.path.join(folder, filename), image)
+    labels[filename] = text
+    with open(labels_path, "w", encoding="utf-8") as file:
+        json.dump(labels, file, indent=2)
+    return os.path.join(folder, filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage and calibrate the OCR engines")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser(
+        "add", help="Add an enhanced crop showing TEXT to a field's calibration samples"
+    )
+    add_parser.add_argument("field", choices=list(FIELD_ALLOWLISTS))
+    add_parser.add_argument("image")
+    add_parser.add_argument("text")
+
+    calibrate_parser = subparsers.add_parser(
+        "calibrate", help="Time every available engine on the samples and show the picks"
+    )
+    calibrate_parser.add_argument("--samples", default=SAMPLES_DIR)
+
+    args = parser.parse_args()
+    if args.command == "add":
+        try:
+            path = add_sample(args.field, args.image, args.text)
+        except ValueError as e:
+            print(f"[OCR] {e}")
+            sys.exit(1)
+        print(f"[OCR] Added {path}")
+        return
+
+    available = [name for name, engine in ENGINES.items() if engine.available()]
+    print(f"[OCR] Available engines: {', '.join(available)}")
+    for field, chain in calibrate(samples_dir=args.samples).items():
+        print(f"[OCR] {field}: {' -> '.join(chain)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import os
+import json
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from core.ocr_worker import init_worker, read_shared
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# OCR worker processes, 0 runs OCR inside the bot's own process
+OCR_WORKERS = config.get("ocrWorkers", 0)
+# Torch threads per OCR process, 0 keeps torch's default in process and
+# splits the cores between the workers otherwise. Lower it when several bot
+# instances share one host.
+OCR_THREADS = config.get("ocrThreads", 0)
+
+
+def torch_threads(workers: int = 0) -> int:
+    """Torch threads to use per OCR process, 0 for torch's default"""
+    if OCR_THREADS or not workers:
+        return OCR_THREADS
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+class OCRService:
+    """Pool of OCR worker processes, each holding its own EasyOCR reader.
+
+    Crops are copied once into shared memory and only their name goes
+    through the pool's request queue. Every request returns a future, so
+    reads run beside capture, matching and ADB I/O in the bot's process,
+    and torch in each worker is limited to its own share of the cores.
+    """
+
+    def __init__(self, workers: int, threads: int = 0, detect: bool = False):
+        self.workers = workers
+        self._initargs = (threads, detect)
+        self._restarted = False
+        self._lock = threading.Lock()
+        self._pool = self._start_pool()
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        # spawn everywhere: the bot runs on Windows, and forking a process
+        # that already holds threads and torch state is unsafe
+        return ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=self._initargs,
+        )
+
+    def submit(
+        self, image: np.ndarray, boxes=None, detect: bool = False, **params
+    ) -> Future:
+        """Queue an OCR read of an image, returns a future of the EasyOCR
+        style [(box, text, confidence)] result"""
+        image = np.ascontiguousarray(image)
+        block = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+        np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf)[:] = image
+        try:
+            future = self._pool.submit(
+                read_shared, block.name, image.shape, image.dtype.str, boxes, detect, params
+            )
+        except Exception:
+            block.close()
+            block.unlink()
+            raise
+
+        def release(_):
+            block.close()
+            block.unlink()
+
+        future.add_done_callback(release)
+        return future
+
+    def read(self, image: np.ndarray, boxes=None, detect: bool = False, **params):
+        """OCR an image and wait for the result.
+
+        When a worker died the pool is broken and is restarted, once; a pool
+        that breaks again raises BrokenProcessPool to the caller.
+        """
+        pool = self._pool
+        try:
+            return self.submit(image, boxes, detect, **params).result()
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    if self._restarted:
+                        raise
+                    print("[OCR] An OCR worker process died, restarting the workers")
+                    self._restarted = True
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = self._start_pool()
+            return self.submit(image, boxes, detect, **params).result()
+
+    def warm_up(self):
+        """Start every worker so their readers load in the background"""
+        blank = np.zeros((32, 96), dtype=np.uint8)
+        for _ in range(self.workers):
+            self.submit(blank)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_ocr_service: Optional[OCRService] = None
+_ocr_service_disabled = False
+_ocr_service_lock = threading.Lock()
+
+
+def get_ocr_service() -> Optional[OCRService]:
+    """Get the shared OCR service sized by `ocrWorkers`, None when OCR runs in
+    process"""
+    global _ocr_service
+    with _ocr_service_lock:
+        if _ocr_service is None and OCR_WORKERS > 0 and not _ocr_service_disabled:
+            detect = config.get("ocrTextDetection", False)
+            _ocr_service = OCRService(OCR_WORKERS, torch_threads(OCR_WORKERS), detect)
+            print(f"[OCR] Started {OCR_WORKERS} OCR worker processes")
+    return _ocr_service
+
+
+def disable_ocr_service():
+    """Stop the OCR workers for good, get_ocr_service() returns None after"""
+    global _ocr_service, _ocr_service_disabled
+    with _ocr_service_lock:
+        _ocr_service_disabled = True
+        if _ocr_service is not None:
+            _ocr_service.shutdown()
+            _ocr_service = None
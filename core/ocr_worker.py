@@ -0,0 +1,59 @@
+"""Entry points of the OCR worker processes.
+
+Spawned workers import only this module to unpickle their tasks, so it must
+stay light: no config, capture, input or template imports, and the OCR
+libraries are imported when a reader is built.
+"""
+from multiprocessing import shared_memory
+from typing import List
+
+import numpy as np
+
+# Reader of a worker process, built by init_worker
+_worker_reader = None
+
+
+def load_recognizer(threads: int = 0, detect: bool = False):
+    """Build an English EasyOCR reader limited to `threads` CPU threads, with
+    its text detector when `detect` is set"""
+    import easyocr
+
+    if threads:
+        import torch
+
+        torch.set_num_threads(threads)
+    return easyocr.Reader(["en"], gpu=False, detector=detect, verbose=False)
+
+
+def init_worker(threads: int, detect: bool):
+    global _worker_reader
+    _worker_reader = load_recognizer(threads, detect)
+    _worker_reader.recognize(np.zeros((32, 96), dtype=np.uint8))
+
+
+def read_shared(name: str, shape, dtype: str, boxes, detect: bool, params: dict) -> List[tuple]:
+    """Run OCR on a crop held in shared memory, in a worker process"""
+    # Workers share the bot's resource tracker, which unregisters the block
+    # once the bot unlinks it
+    block = shared_memory.SharedMemory(name=name)
+    image = None
+    try:
+        image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        if detect:
+            if getattr(_worker_reader, "detector", None) is None:
+                _worker_reader.setDetector("craft")
+            result = _worker_reader.readtext(image, **params)
+        else:
+            if boxes is None:
+                boxes = [[0, shape[1], 0, shape[0]]]
+            result = _worker_reader.recognize(
+                image, horizontal_list=boxes, free_list=[], **params
+            )
+        # Plain types only, the result is pickled back to the bot
+        return [
+            ([[int(x), int(y)] for x, y in box], text, float(confidence))
+            for box, text, confidence in result
+        ]
+    finally:
+        del image
+        block.close()
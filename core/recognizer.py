@@ -6,6 +6,12 @@ from PIL import ImageGrab, ImageStat
 
 from utils.screenshot import capture_region
 from utils.adb_utils import get_adb_controller
+from utils.capture import crop_region, snapshot_frame
+from utils.templates import load_template
+from utils.pyramid import pyramid_match
+from utils.nms import center_suppress, peak_points
+from utils.match_executor import run_parallel
+from utils.image_recognition import pyramid_match_on_frame
 import os
 from datetime import datetime
 from PIL import Image
@@ -46,7 +52,7 @@ def save_debug_image(image, prefix: str = "debug") -> str:
     return filepath
 
 
-def match_template(template_path, secondary_templates={}, region=None, threshold=0.85, debug=False, name=None):
+def match_template(template_path, secondary_templates={}, region=None, threshold=0.85, debug=False, name=None, frame=None, pyramid=False):
     # Check if usePhone is enabled
     try:
         with open("config.json", "r", encoding="utf-8") as file:
@@ -117,45 +123,42 @@ def match_template(template_path, secondary_templates={}, region=None, threshold
 
     # Fallback to desktop screenshot
     # Get screenshot
-    if region:
-        if USE_PHONE:
-            controller = get_adb_controller()
-            if controller and controller.is_connected():
-                # Take full screenshot from phone
-                screen = controller.take_screenshot()
-                x, y, w, h = region
-                screen = screen[y : y + h, x : x + w]
-        else:
-            screen = np.array(ImageGrab.grab(bbox=region))  # (left, top, right, bottom)
-    else:
-        if USE_PHONE:
-            controller = get_adb_controller()
-            if controller and controller.is_connected():
-                # Take full screenshot from phone
-                screen = controller.take_screenshot()
-        else:
-            screen = np.array(ImageGrab.grab())
-
-    screen = cv2.cvtColor(screen, cv2.COLOR_RGB2BGR)
+    if USE_PHONE:
+        # Use the shared frame snapshot of the phone screen
+        frame = frame or snapshot_frame()
+    screen = grab_screen(region, frame, USE_PHONE)
 
     # Match primary template
-    template = cv2.imread(template_path, cv2.IMREAD_COLOR)  # safe default
-    if template.shape[2] == 4:
-        template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
-    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
-
-    loc = np.where(result >= threshold)
-
+    template = load_template(template_path)
     h, w = template.shape[:2]
-    primary_boxes = deduplicate_boxes([(x, y, w, h) for (x, y) in zip(*loc[::-1])])
+    if pyramid:
+        # Coarse-to-fine search, reusing the frame's cached downscaled copies
+        if USE_PHONE and frame is not None:
+            offset_x, offset_y = region[:2] if region else (0, 0)
+            matches = pyramid_match_on_frame(
+                frame, template_path, threshold, region, scale=1.0, top_k=8
+            )
+            points = [(x - offset_x, y - offset_y) for _, (x, y, _, _) in matches]
+        else:
+            points = [(x, y) for _, x, y in pyramid_match(screen, template, threshold, top_k=8)]
+        # Keep the row-major order of a full np.where scan
+        points.sort(key=lambda point: (point[1], point[0]))
+    else:
+        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        xs, ys, _ = peak_points(result, threshold)
+        points = list(zip(xs, ys))
+
+    primary_boxes = deduplicate_boxes([(x, y, w, h) for (x, y) in points])
 
     # Use cv2.minMaxLoc to get max confidence safely from the result matrix
     if debug:
+        if pyramid:
+            result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
         min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
         print(f"[DEBUG] Max confidence for {name}: {max_val:.4f}")
         print(f"[DEBUG] Min confidence for {name}: {min_val:.4f}")
         vis = screen.copy()
-        for (x, y) in zip(*loc[::-1]):
+        for (x, y) in points:
             cv2.rectangle(vis, (x, y), (x + w, y + h), (0, 255, 0), 2)
         save_debug_image(
             Image.fromarray(cv2.cvtColor(vis, cv2.COLOR_BGR2RGB)),
@@ -165,10 +168,7 @@ def match_template(template_path, secondary_templates={}, region=None, threshold
     # Match secondary templates
     secondary_dicts = {}
     for secondary_name, secondary_path in secondary_templates.items():
-        time.sleep(0.5) 
-        secondary_template = cv2.imread(secondary_path, cv2.IMREAD_COLOR)
-        if secondary_template.shape[2] == 4:
-            secondary_template = cv2.cvtColor(secondary_template, cv2.COLOR_BGRA2BGR)
+        secondary_template = load_template(secondary_path)
         result = cv2.matchTemplate(screen, secondary_template, cv2.TM_CCOEFF_NORMED)
 
         if debug:
@@ -177,12 +177,12 @@ def match_template(template_path, secondary_templates={}, region=None, threshold
             print(f"[DEBUG] Min confidence for {secondary_name}: {min_val:.4f}")
         
         if secondary_name == "spirit":
-            loc = np.where(result >= 0.73)
+            xs, ys, _ = peak_points(result, 0.73)
         else:
-            loc = np.where(result >= 0.65)
+            xs, ys, _ = peak_points(result, 0.65)
 
         h, w = secondary_template.shape[:2]
-        secondary_dicts[secondary_name] = deduplicate_boxes([(x, y, w, h) for (x, y) in zip(*loc[::-1])])
+        secondary_dicts[secondary_name] = deduplicate_boxes([(x, y, w, h) for (x, y) in zip(xs, ys)])
 
     return {
         "primary": primary_boxes,
@@ -190,20 +190,60 @@ def match_template(template_path, secondary_templates={}, region=None, threshold
     }
 
 
+def grab_screen(region=None, frame=None, use_phone=True):
+    """BGR image of `region` (or the whole screen), cut from the phone frame
+    or grabbed from the desktop"""
+    if use_phone:
+        frame = frame or snapshot_frame()
+        return crop_region(frame.bgr, region) if region else frame.bgr
+
+    if region:
+        screen = np.array(ImageGrab.grab(bbox=region))  # (left, top, right, bottom)
+    else:
+        screen = np.array(ImageGrab.grab())
+    return cv2.cvtColor(screen, cv2.COLOR_RGB2BGR)
+
+
+def count_templates(templates, region=None, frame=None, use_phone=True):
+    """Match several templates on a single capture of `region`.
+
+    `templates` maps a name to a (template_path, threshold) pair. The region
+    is captured once and every template runs over that one crop, in
+    parallel on the match executor. Returns a dict mapping each name to its
+    deduplicated (x, y, w, h) boxes, relative to the region.
+    """
+    screen = grab_screen(region, frame, use_phone)
+
+    def find_boxes(template_path, threshold):
+        template = load_template(template_path)
+        if template is None:
+            print(f"[ERROR] Could not load template: {template_path}")
+            return []
+        h, w = template.shape[:2]
+        if screen.shape[0] < h or screen.shape[1] < w:
+            return []
+        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+        xs, ys, _ = peak_points(result, threshold)
+        return deduplicate_boxes([(x, y, w, h) for (x, y) in zip(xs, ys)])
+
+    return run_parallel(
+        {
+            name: (lambda path=template_path, threshold=threshold: find_boxes(path, threshold))
+            for name, (template_path, threshold) in templates.items()
+        }
+    )
+
+
 def deduplicate_boxes(boxes, min_dist=5):
-    filtered = []
-    for x, y, w, h in boxes:
-        cx, cy = x + w // 2, y + h // 2
-        if all(
-            abs(cx - (fx + fw // 2)) > min_dist or abs(cy - (fy + fh // 2)) > min_dist
-            for fx, fy, fw, fh in filtered
-        ):
-            filtered.append((x, y, w, h))
-    return filtered
-
-
-def is_infirmary_active(REGION):
-    screenshot = capture_region(REGION)
+    if not boxes:
+        return []
+    return [
+        tuple(int(v) for v in boxes[i]) for i in center_suppress(boxes, min_dist)
+    ]
+
+
+def is_infirmary_active(REGION, frame=None):
+    screenshot = capture_region(REGION, frame=frame)
     grayscale = screenshot.convert("L")
     stat = ImageStat.Stat(grayscale)
     avg_brightness = stat.mean[0]
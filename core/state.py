@@ -2,8 +2,11 @@ import re
 import time
 
 from utils.screenshot import capture_region, enhanced_screenshot
-from core.ocr import extract_text, extract_number
-from core.recognizer import match_template
+from core.ocr_engines import read_field, read_fields
+from core.recognizer import count_templates, grab_screen
+from utils.support_classifier import get_support_classifier
+from utils.capture import wait_for_stable_frame
+from utils.digit_reader import read_number
 import json
 from utils.constants import get_regions_for_mode, MOOD_LIST
 
@@ -13,13 +16,15 @@ with open("config.json", "r", encoding="utf-8") as file:
 USE_PHONE = config.get("usePhone", True)
 SAVE_DEBUG = config.get("saveDebugImages", False)
 SCENARIO = config.get("scenario", 1)
+# "template" matches every type icon, "color" reads the type badges' colors
+SUPPORT_CARD_CLASSIFIER = config.get("supportCardClassifier", "template")
 
 def get_config():
     return config
 
 
 # Get Stat
-def stat_state():
+def stat_state(frame=None):
     stat_regions = {
         "spd": (310, 723, 55, 20) if not USE_PHONE else (73, 858, 65, 22),
         "sta": (405, 723, 55, 20) if not USE_PHONE else (188, 858, 60, 22),
@@ -28,17 +33,21 @@ def stat_state():
         "wit": (690, 723, 55, 20) if not USE_PHONE else (522, 858, 65, 22),
     }
 
+    images = {
+        stat: enhanced_screenshot(region, name=stat, frame=frame)
+        for stat, region in stat_regions.items()
+    }
+    # Read by the digits engines in one pass, e.g. the glyph reader and then
+    # OCR for what it cannot read
     result = {}
-    for stat, region in stat_regions.items():
-        img = enhanced_screenshot(region, name=stat)
-        val = extract_number(img)
+    for stat, val in zip(images, read_fields(list(images.values()), "digits")):
         digits = "".join(filter(str.isdigit, val))
         result[stat] = int(digits) if digits.isdigit() else 0
     return result
 
 
 # Check support card in each training
-def check_support_card(threshold=0.8):
+def check_support_card(threshold=0.8, frame=None):
     SUPPORT_ICONS = {
         "spd": "assets/icons/support_card_type_spd.png",
         "sta": "assets/icons/support_card_type_sta.png",
@@ -49,48 +58,70 @@ def check_support_card(threshold=0.8):
     }
 
     regions = get_regions_for_mode()
-    count_result = {}
-    count_secondary = {}
-    hasCheckedSpirit = False
-    for key, icon_path in SUPPORT_ICONS.items():
+    region = regions["SUPPORT_CARD_ICON_REGION"]
+    if USE_PHONE:
+        # Wait for the training preview to settle instead of a fixed sleep
+        frame = frame or wait_for_stable_frame(region)
+    else:
         time.sleep(0.2)
 
-        # Check spirit card for scenario 2
-        if not hasCheckedSpirit and SCENARIO == 2:
-            matches = match_template(
-                icon_path,
-                secondary_templates={
-                    "spirit": "assets/icons/spirit.png",
-                    "spirit-bomb": "assets/icons/spirit-bomb.png",
-                },
-                region=regions["SUPPORT_CARD_ICON_REGION"],
-                threshold=threshold if not USE_PHONE else 0.67,
-                debug=False,
-                name=f"support_card_{key}",
-            )
-            hasCheckedSpirit = True
-            count_secondary["spirit"] = len(matches.get("secondary").get("spirit"))
-            count_secondary["spirit-bomb"] = len(matches.get("secondary").get("spirit-bomb"))
-        else:
-            matches = match_template(
-                icon_path,
-                region=regions["SUPPORT_CARD_ICON_REGION"],
-                threshold=threshold if not USE_PHONE else 0.67,
-                debug=False,
-                name=f"support_card_{key}",
-            )
-
-        count_result[key] = len(matches.get("primary"))
-
+    icon_threshold = threshold if not USE_PHONE else 0.67
+    templates = {}
+    if SUPPORT_CARD_CLASSIFIER == "color":
+        screen = grab_screen(region, frame, USE_PHONE)
+        type_counts = get_support_classifier().count(screen)
+        count_result = {key: type_counts.get(key, 0) for key in SUPPORT_ICONS}
+    else:
+        templates = {key: (icon_path, icon_threshold) for key, icon_path in SUPPORT_ICONS.items()}
+    # Check spirit cards for scenario 2
+    if SCENARIO == 2:
+        templates["spirit"] = ("assets/icons/spirit.png", 0.73)
+        templates["spirit-bomb"] = ("assets/icons/spirit-bomb.png", 0.65)
+
+    # Every icon is matched over one capture of the icon column
+    boxes = count_templates(templates, region=region, frame=frame, use_phone=USE_PHONE)
+
+    if SUPPORT_CARD_CLASSIFIER != "color":
+        count_result = {key: len(boxes[key]) for key in SUPPORT_ICONS}
+    count_secondary = {}
+    if SCENARIO == 2:
+        count_secondary["spirit"] = len(boxes["spirit"])
+        count_secondary["spirit-bomb"] = len(boxes["spirit-bomb"])
 
     return count_result, count_secondary
 
 
 # Get failure chance (idk how to get energy value)
-def check_failure(name=None):
+def check_failure(name=None, frame=None):
+    return check_failures({name: capture_failure(name, frame=frame)})[name]
+
+
+def capture_failure(name=None, frame=None):
+    """Enhanced crop of the failure chance, to be read later"""
     regions = get_regions_for_mode()
-    failure = enhanced_screenshot(regions["FAILURE_REGION"], name=f"failure_{name}")
-    failure_text = extract_text(failure).lower()
+    return enhanced_screenshot(
+        regions["FAILURE_REGION"], name=f"failure_{name}", frame=frame
+    )
+
+
+def check_failures(images):
+    """Read several failure crops ({name: image}), with the glyph reader or
+    else in one pass of the text engines"""
+    failures = {
+        name: read_number(img, suffix="%", whole=False) for name, img in images.items()
+    }
+    unread = [name for name, value in failures.items() if value is None]
+    if unread:
+        texts = read_fields([images[name] for name in unread])
+        failures.update(
+            (name, parse_failure(text)) for name, text in zip(unread, texts)
+        )
+    return failures
+
+
+def parse_failure(failure_text):
+    """Failure chance from the OCR text of the failure crop, -1 if unreadable"""
+    failure_text = failure_text.lower()
 
     if not failure_text.startswith("failure"):
         return -1
@@ -116,10 +147,10 @@ def check_failure(name=None):
 
 
 # Check mood
-def check_mood():
+def check_mood(frame=None):
     regions = get_regions_for_mode()
-    mood = capture_region(regions["MOOD_REGION"], name="mood")
-    mood_text = extract_text(mood).upper()
+    mood = capture_region(regions["MOOD_REGION"], name="mood", frame=frame)
+    mood_text = read_field(mood, "word").upper()
 
     for known_mood in MOOD_LIST:
         if known_mood in mood_text:
@@ -130,10 +161,13 @@ def check_mood():
 
 
 # Check turn
-def check_turn():
+def check_turn(frame=None):
     regions = get_regions_for_mode()
-    turn = enhanced_screenshot(regions["TURN_REGION"], name="turn")
-    turn_text = extract_text(turn)
+    turn = enhanced_screenshot(regions["TURN_REGION"], name="turn", frame=frame)
+    turn_number = read_number(turn)
+    if turn_number is not None:
+        return turn_number
+    turn_text = read_field(turn)
 
     if "Race Day" in turn_text:
         return "Race Day"
@@ -158,34 +192,40 @@ def check_turn():
 
 
 # Check year
-def check_current_year():
+def check_current_year(frame=None):
     regions = get_regions_for_mode()
-    year = enhanced_screenshot(regions["YEAR_REGION"], name="year")
-    text = extract_text(year)
+    year = enhanced_screenshot(regions["YEAR_REGION"], name="year", frame=frame)
+    text = read_field(year)
     return text
 
 
 # Check criteria
-def check_criteria():
+def check_criteria(frame=None):
     regions = get_regions_for_mode()
-    img = enhanced_screenshot(regions["CRITERIA_REGION"], name="criteria")
-    text = extract_text(img)
+    img = enhanced_screenshot(
+        regions["CRITERIA_REGION"], name="criteria", frame=frame
+    )
+    text = read_field(img)
     return text
 
 
 # Check event name
-def check_event_name():
+def check_event_name(frame=None):
     regions = get_regions_for_mode()
-    img = enhanced_screenshot(regions["EVENT_NAME_REGION"], name="event_name")
-    text = extract_text(img)
+    img = enhanced_screenshot(
+        regions["EVENT_NAME_REGION"], name="event_name", frame=frame
+    )
+    text = read_field(img)
     return text
 
 
 # Check skill points
-def check_skill_points():
+def check_skill_points(frame=None):
     regions = get_regions_for_mode()
-    img = enhanced_screenshot(regions["SKILL_PTS_REGION"], name="skill_points")
-    number = extract_number(img)
+    img = enhanced_screenshot(
+        regions["SKILL_PTS_REGION"], name="skill_points", frame=frame
+    )
+    number = read_field(img, "digits")
     digits = "".join(filter(str.isdigit, number))
     return int(digits) if digits.isdigit() else 0
 
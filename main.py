@@ -1,8 +1,5 @@
 import time
 import json
-import pygetwindow as gw
-
-from core.execute import career_lobby
 
 # Load config
 with open("config.json", "r", encoding="utf-8") as file:
@@ -13,6 +10,8 @@ USE_PHONE = config.get("usePhone", True)
 def focus_umamusume():
   try:
     if not USE_PHONE:
+      import pygetwindow as gw
+
       # Look for Umamusume window when not in phone mode
       windows = gw.getWindowsWithTitle("Umamusume")
       if not windows:
@@ -30,7 +29,21 @@ def focus_umamusume():
     print(f"[INFO] Could not focus window: {e}. Continuing anyway.")
 
 def main():
+  # Imported here rather than at the top: spawned OCR worker processes
+  # re-run this module, and must not load the bot, its input libraries and
+  # templates
+  from core.execute import career_lobby
+  from core.ocr import start_ocr_warmup
+  from core.ocr_engines import start_calibration
+  from utils.templates import preload_templates
+
   print("Uma Auto!")
+  # Load the OCR model in the background while templates load and the
+  # window / device is found
+  start_ocr_warmup()
+  # Pick the OCR engine of every field type once the model is up
+  start_calibration()
+  print(f"[INFO] Loaded {preload_templates()} templates.")
   focus_umamusume()
   
   career_lobby()
@@ -0,0 +1,17 @@
+import os
+import sys
+from unittest import mock
+
+# The bot runs from the repository root: modules import "core" and "utils"
+# from there and read config.json and assets/ relative to it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# pyautogui needs a desktop session (it fails to import on headless CI).
+# The helpers under test never move the mouse, so a mock stands in for it.
+try:
+    import pyautogui  # noqa: F401
+except Exception:
+    sys.modules["pyautogui"] = mock.MagicMock()
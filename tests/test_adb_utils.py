@@ -0,0 +1,32 @@
+import struct
+
+import numpy as np
+
+from utils.adb_utils import ADBController
+
+
+def raw_screencap(rgba: np.ndarray, pixel_format: int = 1, color_space: bool = False) -> bytes:
+    height, width = rgba.shape[:2]
+    header = struct.pack("<III", width, height, pixel_format)
+    if color_space:
+        header += struct.pack("<I", 1)
+    return header + rgba.tobytes()
+
+
+def test_decode_raw_screencap():
+    rgba = np.random.default_rng(0).integers(0, 256, (4, 3, 4), dtype=np.uint8)
+    for color_space in (False, True):
+        image = ADBController._decode_raw_screencap(raw_screencap(rgba, color_space=color_space))
+        assert image.shape == (4, 3, 3)
+        np.testing.assert_array_equal(image, rgba[:, :, :3])
+
+
+def test_decode_raw_screencap_rejects_other_output():
+    rgba = np.zeros((4, 3, 4), np.uint8)
+    assert ADBController._decode_raw_screencap(b"") is None
+    assert ADBController._decode_raw_screencap(b"\x89PNG\r\n\x1a\n" + bytes(64)) is None
+    # Unsupported pixel format (RGB_565)
+    assert ADBController._decode_raw_screencap(raw_screencap(rgba, pixel_format=4)) is None
+    # Truncated payload
+    assert ADBController._decode_raw_screencap(raw_screencap(rgba)[:-5]) is None
+    assert ADBController._decode_raw_screencap(raw_screencap(np.zeros((0, 3, 4), np.uint8))) is None
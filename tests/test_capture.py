@@ -0,0 +1,28 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from utils import capture
+from utils.capture import Frame, is_frame_stale
+
+
+def make_frame(age: float = 0.0) -> Frame:
+    return Frame(np.zeros((4, 4, 3), np.uint8), time.time() - age)
+
+
+def test_is_frame_stale_by_age(monkeypatch):
+    monkeypatch.setattr(capture, "get_adb_controller", lambda: None)
+    assert is_frame_stale(None)
+    assert not is_frame_stale(make_frame(0.1), max_age=1.0)
+    assert is_frame_stale(make_frame(2.0), max_age=1.0)
+
+
+def test_is_frame_stale_after_input(monkeypatch):
+    frame = make_frame(0.5)
+    controller = SimpleNamespace(last_input_time=frame.timestamp - 1)
+    monkeypatch.setattr(capture, "get_adb_controller", lambda: controller)
+    assert not is_frame_stale(frame, max_age=1.0)
+
+    controller.last_input_time = frame.timestamp + 0.1
+    assert is_frame_stale(frame, max_age=1.0)
@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+import pytest
+
+from utils.digit_reader import DigitReader, extract_glyphs
+
+
+def render(text: str) -> np.ndarray:
+    """Dark text on a light background, like an enhanced HUD crop"""
+    image = np.full((40, 30 * len(text) + 20), 255, np.uint8)
+    cv2.putText(image, text, (8, 32), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2, cv2.LINE_AA)
+    return image
+
+
+@pytest.fixture(scope="module")
+def reader(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("digits")
+    path = str(folder / "field.png")
+    cv2.imwrite(path, render("0123456789%"))
+    assert extract_glyphs(path, "0123456789%", str(folder / "bank")) == 11
+    return DigitReader(str(folder / "bank"))
+
+
+@pytest.mark.parametrize("text", ["0", "7", "1234", "907", "1200"])
+def test_read_number(reader, text):
+    value, confidence = reader.read_number(render(text))
+    assert value == int(text)
+    assert confidence > 0.9
+
+
+def test_read_number_with_suffix(reader):
+    assert reader.read_number(render("56%"), suffix="%")[0] == 56
+    # The suffix must close the number
+    assert reader.read_number(render("56"), suffix="%")[0] is None
+
+
+def test_read_number_whole(reader):
+    assert reader.read_number(render("ab12"))[0] is None
+    assert reader.read_number(render("ab12"), whole=False)[0] == 12
+
+
+def test_empty_bank(tmp_path):
+    reader = DigitReader(str(tmp_path))
+    assert reader.templates.shape == (0, 24 * 24)
+    assert reader.read_number(render("12")) == (None, 0.0)
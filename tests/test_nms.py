@@ -0,0 +1,27 @@
+import numpy as np
+
+from utils.nms import center_suppress, iou_suppress
+
+
+def test_iou_suppress_keeps_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [50, 50, 10, 10], [2, 0, 10, 10]])
+    scores = np.array([0.8, 0.9, 0.7, 0.85])
+    np.testing.assert_array_equal(iou_suppress(boxes, scores), [1, 2])
+
+
+def test_iou_suppress_threshold_and_ties():
+    # IoU of these two boxes is 1/3
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 10, 10]])
+    np.testing.assert_array_equal(iou_suppress(boxes, [0.5, 0.5], overlap_threshold=0.3), [0])
+    np.testing.assert_array_equal(iou_suppress(boxes, [0.5, 0.5], overlap_threshold=0.5), [0, 1])
+
+
+def test_iou_suppress_empty():
+    assert iou_suppress(np.empty((0, 4)), np.empty(0)).size == 0
+
+
+def test_center_suppress_keeps_first_in_input_order():
+    boxes = np.array([[0, 0, 10, 10], [3, 3, 10, 10], [20, 0, 10, 10], [0, 4, 10, 10]])
+    np.testing.assert_array_equal(center_suppress(boxes, min_dist=5), [0, 2])
+    np.testing.assert_array_equal(center_suppress(boxes, min_dist=2), [0, 1, 2, 3])
+    assert center_suppress(np.empty((0, 4))).size == 0
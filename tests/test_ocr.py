@@ -0,0 +1,48 @@
+import numpy as np
+
+from core import ocr
+from core.ocr import extract_batch
+
+
+def crops():
+    return [
+        np.full((10, 30), 50, np.uint8),
+        np.full((16, 20), 100, np.uint8),
+        np.full((8, 40), 150, np.uint8),
+    ]
+
+
+def fake_ocr(calls):
+    def run(image, boxes=None, detect=False, **params):
+        # "Reads" a crop as its gray level
+        calls.append(params.get("allowlist"))
+        corners = [[0, 0], [image.shape[1], 0], [image.shape[1], image.shape[0]], [0, image.shape[0]]]
+        return [(corners, str(image[0, 0]), 0.9)]
+
+    return run
+
+
+def test_extract_batch_keeps_order_and_allowlists(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ocr, "_run_ocr", fake_ocr(calls))
+    assert extract_batch(crops(), cache=False) == ["50", "100", "150"]
+    assert calls == [None, None, None]
+
+    calls.clear()
+    texts = extract_batch(crops(), allowlists=["0123456789", None, "0123456789"], cache=False)
+    assert texts == ["50", "100", "150"]
+    assert calls == ["0123456789", None, "0123456789"]
+
+
+def test_extract_batch_answers_repeats_from_cache(monkeypatch):
+    class Cache(dict):
+        def put(self, key, value):
+            self[key] = value
+
+    calls = []
+    monkeypatch.setattr(ocr, "_run_ocr", fake_ocr(calls))
+    cache = Cache()
+    monkeypatch.setattr(ocr, "get_ocr_cache", lambda: cache)
+    assert extract_batch(crops()) == ["50", "100", "150"]
+    assert extract_batch(crops()) == ["50", "100", "150"]
+    assert len(calls) == 3
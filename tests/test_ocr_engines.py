@@ -0,0 +1,87 @@
+import json
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from core import ocr_engines
+from core.ocr_engines import DEFAULT_CHAINS, OCREngine, calibrate
+
+
+class FakeEngine(OCREngine):
+    def __init__(self, name, delay, correct, fields=("digits", "word", "text")):
+        self.name = name
+        self.fields = fields
+        self.delay = delay
+        # Share of the samples read right
+        self.correct = correct
+        self.reads = 0
+
+    def read_batch(self, images, allowlist, cache=True):
+        texts = []
+        for image in images:
+            self.reads += 1
+            time.sleep(self.delay)
+            right = int(image[0, 0]) < self.correct * 100
+            texts.append(str(int(image[0, 0])) if right else "?")
+        return texts
+
+
+def write_samples(folder, field, count=10):
+    field_dir = folder / field
+    field_dir.mkdir(parents=True)
+    labels = {}
+    for i in range(count):
+        # Pixel value i * 10 lets the fake engines decide which they get right
+        cv2.imwrite(str(field_dir / f"{i}.png"), np.full((8, 8), i * 10, np.uint8))
+        labels[f"{i}.png"] = str(i * 10)
+    (field_dir / "labels.json").write_text(json.dumps(labels))
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    engines = {}
+    monkeypatch.setattr(ocr_engines, "ENGINES", engines)
+    monkeypatch.setattr(ocr_engines, "OCR_ENGINES", {})
+    return engines
+
+
+def test_calibrate_picks_fastest_accurate_engine(engines, tmp_path):
+    engines["easyocr"] = FakeEngine("easyocr", 0.004, 1.0)
+    engines["tesseract"] = FakeEngine("tesseract", 0.0, 0.9)
+    engines["digits"] = FakeEngine("digits", 0.0, 0.5, fields=("digits",))
+    write_samples(tmp_path, "digits")
+    write_samples(tmp_path, "text")
+
+    chains = calibrate(samples_dir=str(tmp_path))
+    # digits is fastest but below ACCURACY_FLOOR
+    assert chains["digits"] == ["tesseract", "easyocr"]
+    assert chains["text"] == ["tesseract", "easyocr"]
+    # No samples for word fields
+    assert chains["word"] == DEFAULT_CHAINS["word"]
+
+
+def test_calibrate_falls_back_to_most_accurate(engines, tmp_path):
+    engines["easyocr"] = FakeEngine("easyocr", 0.0, 0.8)
+    engines["tesseract"] = FakeEngine("tesseract", 0.0, 0.5)
+    write_samples(tmp_path, "text")
+    assert calibrate(("text",), str(tmp_path)) == {"text": ["easyocr"]}
+
+
+def test_calibrate_keeps_configured_engines(engines, tmp_path, monkeypatch):
+    engines["easyocr"] = FakeEngine("easyocr", 0.0, 1.0)
+    engines["tesseract"] = FakeEngine("tesseract", 0.0, 1.0)
+    monkeypatch.setattr(ocr_engines, "OCR_ENGINES", {"text": "tesseract", "word": "easyocr"})
+    write_samples(tmp_path, "text")
+
+    assert calibrate(("text", "word"), str(tmp_path)) == {
+        "text": ["tesseract", "easyocr"],
+        "word": ["easyocr"],
+    }
+    assert engines["tesseract"].reads == 0
+
+
+def test_engine_needs_read_batch():
+    with pytest.raises(TypeError):
+        OCREngine()
@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+
+from utils.pyramid import coarse_factor, pyramid_match
+
+
+def textured_image(shape=(240, 320)) -> np.ndarray:
+    noise = np.random.default_rng(1).integers(0, 256, shape, dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (0, 0), 3)
+
+
+def test_pyramid_match_finds_the_full_scale_match():
+    image = textured_image()
+    template = image[100:148, 150:214].copy()
+    matches = pyramid_match(image, template, threshold=0.8)
+    assert matches
+    score, x, y = matches[0]
+    assert (x, y) == (150, 100)
+    assert score > 0.99
+
+    result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+    assert score == result.max()
+
+
+def test_pyramid_match_with_shifted_coarse_crop():
+    image = textured_image()
+    template = image[100:148, 150:214].copy()
+    factor = coarse_factor(template.shape)
+    # Coarse image of a crop starting 40 px right and 20 px down in `image`
+    coarse = cv2.resize(image[20:, 40:], None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    matches = pyramid_match(image, template, 0.8, coarse_image=coarse, factor=factor, shift=(40, 20))
+    assert matches[0][1:] == (150, 100)
+
+
+def test_pyramid_match_small_and_oversized_templates():
+    image = textured_image()
+    small = image[10:16, 20:26].copy()
+    assert coarse_factor(small.shape) is None
+    assert (20, 10) in [(x, y) for _, x, y in pyramid_match(image, small, 0.99)]
+    assert pyramid_match(image[:20, :20], image[:40, :40], 0.5) == []
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from utils.screenshot import contrast_lut, enhance_for_ocr
+
+
+def pil_enhance(rgb: np.ndarray) -> np.ndarray:
+    """The PIL resize, convert("L") and contrast steps enhance_for_ocr replaces"""
+    image = Image.fromarray(rgb)
+    image = image.resize((image.width * 2, image.height * 2), Image.BICUBIC).convert("L")
+    return np.asarray(ImageEnhance.Contrast(image).enhance(1.5))
+
+
+def hud_crop(rng, width=65, height=22) -> np.ndarray:
+    crop = np.empty((height, width, 3), np.uint8)
+    crop[:] = [int(c) for c in rng.integers(200, 250, 3)]
+    crop = cv2.subtract(crop, rng.integers(0, 20, crop.shape, dtype=np.uint8))
+    text = str(int(rng.integers(0, 1200)))
+    cv2.putText(crop, text, (2, height - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (40, 40, 50), 1, cv2.LINE_AA)
+    return crop
+
+
+def test_contrast_lut_matches_pil():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        gray = rng.integers(0, 256, (30, 40), dtype=np.uint8)
+        expected = np.asarray(ImageEnhance.Contrast(Image.fromarray(gray)).enhance(1.5))
+        mean = int(gray.mean() + 0.5)
+        np.testing.assert_array_equal(cv2.LUT(gray, contrast_lut(mean)), expected)
+
+
+def test_enhance_for_ocr_close_to_pil():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        crop = hud_crop(rng)
+        expected = pil_enhance(crop).astype(np.int16)
+        actual = enhance_for_ocr(crop)
+        assert actual.shape == expected.shape
+        difference = np.abs(actual.astype(np.int16) - expected)
+        assert difference.mean() < 1.0
+        assert difference.max() <= 16
+
+
+def test_enhance_for_ocr_frame_slices_and_out():
+    rng = np.random.default_rng(1)
+    frame = np.ascontiguousarray(np.tile(hud_crop(rng), (3, 3, 1)))
+    crop = frame[22:44, 65:130]
+    expected = enhance_for_ocr(crop.copy())
+    out = np.empty_like(expected)
+    assert enhance_for_ocr(crop, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+
+    bgra = cv2.cvtColor(crop, cv2.COLOR_RGB2BGRA)
+    np.testing.assert_array_equal(enhance_for_ocr(bgra, code=cv2.COLOR_BGRA2GRAY), expected)
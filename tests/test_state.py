@@ -0,0 +1,65 @@
+import pytest
+
+from core import state
+from core.state import check_failures, parse_failure
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Failure 12%", 12),
+        ("FAILURE 0%", 0),
+        ("Failure 100%", 100),
+        # OCR reads the % sign as a 9
+        ("Failure 129", 12),
+        ("Failure 7", 7),
+        ("Failure", -1),
+        ("Failure ab%", -1),
+        ("Success 12%", -1),
+        ("", -1),
+    ],
+)
+def test_parse_failure(text, expected):
+    assert parse_failure(text) == expected
+
+
+def test_check_failures_reads_glyphs_then_text(monkeypatch):
+    glyphs = {"spd": 5, "sta": None, "pwr": 12, "guts": None, "wit": None}
+    texts = {"sta": "Failure 30%", "guts": "Failure 129", "wit": "???"}
+    batches = []
+
+    def read_fields(images, field="text"):
+        batches.append(list(images))
+        return [texts[image] for image in images]
+
+    monkeypatch.setattr(state, "read_number", lambda image, suffix=None, whole=True: glyphs[image])
+    monkeypatch.setattr(state, "read_fields", read_fields)
+
+    failures = check_failures({name: name for name in glyphs})
+    assert failures == {"spd": 5, "sta": 30, "pwr": 12, "guts": 12, "wit": -1}
+    # Only the crops the glyph reader missed, in one batch
+    assert batches == [["sta", "guts", "wit"]]
+
+
+def test_stat_state_reads_one_digits_batch(monkeypatch):
+    monkeypatch.setattr(state, "enhanced_screenshot", lambda region, name=None, frame=None: name)
+    batches = []
+
+    def read_fields(images, field="text"):
+        batches.append((list(images), field))
+        return ["1140", "35O", "", "1,000", "900"]
+
+    monkeypatch.setattr(state, "read_fields", read_fields)
+    assert state.stat_state() == {"spd": 1140, "sta": 35, "pwr": 0, "guts": 1000, "wit": 900}
+    assert batches == [(["spd", "sta", "pwr", "guts", "wit"], "digits")]
+
+
+def test_check_turn(monkeypatch):
+    monkeypatch.setattr(state, "enhanced_screenshot", lambda region, name=None, frame=None: name)
+    monkeypatch.setattr(state, "read_number", lambda image, suffix=None, whole=True: None)
+    for text, expected in [("Race Day", "Race Day"), ("GOAL", "Goal"), ("1O", 10), ("T2", 12), ("", -1)]:
+        monkeypatch.setattr(state, "read_field", lambda image, field="text", text=text: text)
+        assert state.check_turn() == expected
+
+    monkeypatch.setattr(state, "read_number", lambda image, suffix=None, whole=True: 7)
+    assert state.check_turn() == 7
@@ -0,0 +1,219 @@
+import os
+import queue
+import socket
+import threading
+import itertools
+from typing import List, Optional, Tuple
+
+
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+
+
+class ADBProtocolError(Exception):
+    """Raised when the adb server answers FAIL or breaks the protocol"""
+
+
+class ADBHostClient:
+    """In-process client for the adb server host protocol.
+
+    Speaks the same protocol the `adb` binary uses to talk to the local adb
+    server (`host:devices`, `host:connect`, `host:transport`, `shell:`,
+    `exec:`), so commands cost a socket round trip instead of a process spawn.
+    For every device a small pool of sockets that already completed
+    `host:transport:<serial>` is kept ready; each shell or exec request
+    consumes one of them and the pool is refilled in the background.
+    """
+
+    MARKER_PREFIX = "__UMA_DONE__"
+
+    def __init__(
+        self,
+        host: str = DEFAULT_SERVER_HOST,
+        port: int = DEFAULT_SERVER_PORT,
+        pool_size: int = 2,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pools = {}
+        # Serials whose pool a background thread is refilling
+        self._refilling = set()
+        self._pools_lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    # Low-level protocol helpers
+
+    def _open(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ADBProtocolError("connection closed by adb server")
+            data.extend(chunk)
+        return bytes(data)
+
+    @staticmethod
+    def _recv_all(sock: socket.socket) -> bytes:
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def _read_length_prefixed(self, sock: socket.socket) -> bytes:
+        length = int(self._recv_exact(sock, 4), 16)
+        return self._recv_exact(sock, length)
+
+    def _send_request(self, sock: socket.socket, request: str):
+        """Send a request and wait for OKAY, raising on FAIL"""
+        payload = request.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+        status = self._recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            message = self._read_length_prefixed(sock).decode("utf-8", errors="replace")
+            raise ADBProtocolError(f"{request}: {message}")
+        raise ADBProtocolError(f"{request}: unexpected status {status!r}")
+
+    def _host_query(self, request: str) -> str:
+        """Run a host service that answers with a length-prefixed string"""
+        with self._open() as sock:
+            self._send_request(sock, request)
+            return self._read_length_prefixed(sock).decode("utf-8", errors="replace")
+
+    # Transport pool
+
+    def _open_transport(self, serial: str) -> socket.socket:
+        sock = self._open()
+        try:
+            self._send_request(sock, f"host:transport:{serial}")
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _get_pool(self, serial: str) -> queue.Queue:
+        with self._pools_lock:
+            if serial not in self._pools:
+                self._pools[serial] = queue.Queue(maxsize=self.pool_size)
+            return self._pools[serial]
+
+    def _refill(self, serial: str):
+        pool = self._get_pool(serial)
+        try:
+            while not pool.full():
+                sock = self._open_transport(serial)
+                try:
+                    pool.put_nowait(sock)
+                except queue.Full:
+                    sock.close()
+        except (OSError, ADBProtocolError):
+            # The next request opens its own transport and reports the error
+            pass
+        finally:
+            with self._pools_lock:
+                self._refilling.discard(serial)
+
+    def _start_refill(self, serial: str):
+        """Refill a device's pool in the background, one thread at a time"""
+        with self._pools_lock:
+            if serial in self._refilling:
+                return
+            self._refilling.add(serial)
+        threading.Thread(target=self._refill, args=(serial,), daemon=True).start()
+
+    def _acquire_transport(self, serial: str) -> Tuple[socket.socket, bool]:
+        """Return (socket, pooled) where pooled tells if it came from the pool"""
+        pool = self._get_pool(serial)
+        try:
+            sock = pool.get_nowait()
+            pooled = True
+        except queue.Empty:
+            sock = self._open_transport(serial)
+            pooled = False
+        self._start_refill(serial)
+        return sock, pooled
+
+    def _run_service(self, serial: str, service: str) -> bytes:
+        """Open `service` on the device and return everything it writes"""
+        sock, pooled = self._acquire_transport(serial)
+        try:
+            try:
+                self._send_request(sock, service)
+            except (OSError, ADBProtocolError):
+                if not pooled:
+                    raise
+                # A pooled transport may have gone stale, retry on a fresh one
+                sock.close()
+                sock = self._open_transport(serial)
+                self._send_request(sock, service)
+            return self._recv_all(sock)
+        finally:
+            sock.close()
+
+    def close(self):
+        """Close all pooled transports"""
+        with self._pools_lock:
+            pools = list(self._pools.values())
+            self._pools = {}
+        for pool in pools:
+            while not pool.empty():
+                pool.get_nowait().close()
+
+    # Public API
+
+    def version(self) -> int:
+        return int(self._host_query("host:version"), 16)
+
+    def devices(self) -> List[dict]:
+        """List devices as dicts with 'serial' and 'status'"""
+        devices = []
+        for line in self._host_query("host:devices").splitlines():
+            parts = line.strip().split("\t")
+            if len(parts) == 2:
+                devices.append({"serial": parts[0], "status": parts[1]})
+        return devices
+
+    def connect_device(self, address: str) -> str:
+        """Equivalent of `adb connect <address>`, returns the server message"""
+        return self._host_query(f"host:connect:{address}")
+
+    def shell(self, serial: str, command: str) -> Tuple[int, str]:
+        """Run a shell command, returns (exit status, output)"""
+        marker = f"{self.MARKER_PREFIX}{next(self._sequence)}"
+        raw = self._run_service(serial, f"shell:{command}; echo {marker} $?")
+        output = raw.decode("utf-8", errors="replace").replace("\r\n", "\n")
+
+        head, found, tail = output.rpartition(marker)
+        if not found:
+            raise ADBProtocolError(f"shell:{command}: missing completion marker")
+        status = tail.strip()
+        return (int(status) if status.isdigit() else 0), head.rstrip("\n")
+
+    def exec_out(self, serial: str, command: str) -> bytes:
+        """Run a command with a raw binary-safe stream, like `adb exec-out`"""
+        return self._run_service(serial, f"exec:{command}")
+
+
+_host_clients = {}
+
+
+def get_host_client(
+    host: Optional[str] = None, port: Optional[int] = None
+) -> ADBHostClient:
+    """Get or create the shared client for an adb server address"""
+    key = (host or DEFAULT_SERVER_HOST, port or DEFAULT_SERVER_PORT)
+    if key not in _host_clients:
+        _host_clients[key] = ADBHostClient(*key)
+    return _host_clients[key]
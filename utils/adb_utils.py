@@ -2,23 +2,154 @@ import subprocess
 import json
 import time
 import re
-import socket
+import struct
+import queue
+import threading
+import itertools
 import cv2
 import numpy as np
 from typing import Optional, Tuple, List
 
+from utils.adb_client import ADBHostClient, ADBProtocolError, get_host_client
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# "subprocess" runs the adb binary, "socket" talks to the adb server directly
+ADB_BACKEND = config.get("adbBackend", "subprocess")
+ADB_SERVER_HOST = config.get("adbServerHost")
+ADB_SERVER_PORT = config.get("adbServerPort")
+
+
+class ADBShellSession:
+    """Long-lived `adb shell` process shared by all input commands of a device.
+
+    Commands are written to the shell's stdin followed by an `echo` of a unique
+    completion marker, so a tap costs one pipe write instead of a process spawn.
+    A reader thread queues stdout lines; if the shell dies or stops answering it
+    is killed and respawned on the next command.
+    """
+
+    MARKER_PREFIX = "__UMA_DONE__"
+
+    def __init__(self, device_id: str, adb_binary: str = "adb", timeout: float = 5.0):
+        self.device_id = device_id
+        self.adb_binary = adb_binary
+        self.timeout = timeout
+        self._process = None
+        self._lines = None
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def _spawn(self):
+        """Start the shell process and its stdout reader thread"""
+        self._process = subprocess.Popen(
+            [self.adb_binary, "-s", self.device_id, "shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._read_output,
+            args=(self._process, self._lines),
+            daemon=True,
+        ).start()
+
+    @staticmethod
+    def _read_output(process, lines):
+        """Forward shell output lines to the queue until the process exits"""
+        for raw_line in iter(process.stdout.readline, b""):
+            lines.put(raw_line.decode("utf-8", errors="replace").rstrip("\r\n"))
+        lines.put(None)
+
+    def _is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def close(self):
+        """Terminate the shell process"""
+        if self._process is not None:
+            try:
+                self._process.kill()
+            except OSError:
+                pass
+            self._process = None
+
+    def _execute(self, command: str) -> Tuple[int, str]:
+        if not self._is_alive():
+            self._spawn()
+
+        marker = f"{self.MARKER_PREFIX}{next(self._sequence)}"
+        self._process.stdin.write(f"{command}; echo {marker} $?\n".encode("utf-8"))
+        self._process.stdin.flush()
+
+        output = []
+        deadline = time.time() + self.timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"no completion marker after {self.timeout}s")
+            line = self._lines.get(timeout=remaining)
+            if line is None:
+                raise BrokenPipeError("adb shell exited")
+            if line.startswith(marker):
+                status = line[len(marker) :].strip()
+                return (int(status) if status.isdigit() else 0), "\n".join(output)
+            output.append(line)
+
+    def run(self, command: str) -> Tuple[int, str]:
+        """Run a command in the shell and wait for its completion marker.
+
+        Returns (exit status, output). Retries once on a fresh shell if the
+        current one is broken.
+        """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    return self._execute(command)
+                except (OSError, TimeoutError, queue.Empty) as e:
+                    self.close()
+                    if attempt == 1:
+                        raise RuntimeError(f"adb shell session failed: {e}") from e
+                    print(f"[ADB] Shell session lost ({e}), respawning")
+
 
 class ADBController:
     """ADB controller for phone emulation via Mumu instance"""
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 16384):
+    # screencap pixel formats that carry 4 bytes per pixel in RGBA order
+    RAW_PIXEL_FORMATS = (1, 2)  # RGBA_8888, RGBX_8888
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 16384,
+        raw_screencap: bool = True,
+        backend: Optional[str] = None,
+        client: Optional[ADBHostClient] = None,
+    ):
         self.host = host
         self.port = port
         self.device_id = None
+        self.raw_screencap = raw_screencap
+        self.backend = backend or ADB_BACKEND
+        # time.time() of the last input sent, frames captured before it are stale
+        self.last_input_time = 0.0
+        self._shell_session = None
+        self._client = client
+        if self.backend == "socket" and self._client is None:
+            self._client = get_host_client(ADB_SERVER_HOST, ADB_SERVER_PORT)
         self._connect()
 
     def _connect(self):
         """Connect to ADB device"""
+        if self._client is not None:
+            return self._connect_with_client()
+
         try:
             # Connect to the ADB server
             subprocess.run(
@@ -51,6 +182,30 @@ class ADBController:
             )
             return False
 
+    def _connect_with_client(self):
+        """Connect to ADB device through the adb server socket"""
+        serial = f"{self.host}:{self.port}"
+        try:
+            try:
+                self._client.connect_device(serial)
+            except ConnectionRefusedError:
+                # The adb server is not running yet, let the adb binary start it
+                subprocess.run(["adb", "start-server"], check=True, capture_output=True)
+                self._client.connect_device(serial)
+
+            for device in self._client.devices():
+                if device["serial"] == serial and device["status"] == "device":
+                    self.device_id = serial
+                    print(f"[ADB] Connected to device: {self.device_id} (socket)")
+                    return True
+
+            print("[ADB] Failed to connect to device")
+            return False
+
+        except (OSError, ADBProtocolError, subprocess.CalledProcessError) as e:
+            print(f"[ADB] Connection error: {e}")
+            return False
+
     def click(self, x: int, y: int, duration: float = 0.175):
         """Perform click at coordinates using ADB"""
         if not self.device_id:
@@ -63,8 +218,7 @@ class ADBController:
                 time.sleep(duration)
 
             # Execute click command
-            cmd = ["adb", "-s", self.device_id, "shell", "input", "tap", str(x), str(y)]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            self.send_input(f"tap {x} {y}")
 
             # print(f"[ADB] Clicked at ({x}, {y})")
             return True
@@ -81,18 +235,7 @@ class ADBController:
 
         try:
             # Use ADB shell input motionevent DOWN command
-            cmd = [
-                "adb",
-                "-s",
-                self.device_id,
-                "shell",
-                "input",
-                "motionevent",
-                "DOWN",
-                str(x),
-                str(y),
-            ]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            self.send_input(f"motionevent DOWN {x} {y}")
 
             # print(f"[ADB] Mouse down at ({x}, {y})")
             return True
@@ -109,18 +252,7 @@ class ADBController:
 
         try:
             # Use ADB shell input motionevent UP command
-            cmd = [
-                "adb",
-                "-s",
-                self.device_id,
-                "shell",
-                "input",
-                "motionevent",
-                "UP",
-                str(x),
-                str(y),
-            ]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            self.send_input(f"motionevent UP {x} {y}")
 
             # print(f"[ADB] Mouse up at ({x}, {y})")
             return True
@@ -151,6 +283,64 @@ class ADBController:
         """Check if ADB device is connected"""
         return self.device_id is not None
 
+    def shell(self, command: str) -> str:
+        """Run a shell command on the device, reusing the persistent shell session.
+
+        Falls back to a one-off `adb shell` subprocess if the session cannot be
+        used. Raises subprocess.CalledProcessError when the command fails.
+        """
+        if self._client is not None:
+            try:
+                status, output = self._client.shell(self.device_id, command)
+            except (OSError, ADBProtocolError) as e:
+                raise subprocess.CalledProcessError(1, command, stderr=str(e)) from e
+            if status != 0:
+                raise subprocess.CalledProcessError(status, command, output)
+            return output
+
+        try:
+            if self._shell_session is None:
+                self._shell_session = ADBShellSession(self.device_id)
+            status, output = self._shell_session.run(command)
+        except RuntimeError as e:
+            print(f"[ADB] {e}, falling back to one-off shell")
+            result = subprocess.run(
+                ["adb", "-s", self.device_id, "shell", command],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            return result.stdout
+
+        if status != 0:
+            raise subprocess.CalledProcessError(status, command, output)
+        return output
+
+    def send_input(self, args: str):
+        """Send an `input` command and record when the screen was last touched"""
+        self.shell(f"input {args}")
+        self.last_input_time = time.time()
+
+    def exec_out(self, command: str) -> bytes:
+        """Run a command and return its raw binary output, like `adb exec-out`.
+
+        Raises subprocess.CalledProcessError when the command fails.
+        """
+        if self._client is not None:
+            try:
+                return self._client.exec_out(self.device_id, command)
+            except (OSError, ADBProtocolError) as e:
+                raise subprocess.CalledProcessError(1, command, stderr=str(e)) from e
+
+        cmd = ["adb", "-s", self.device_id, "exec-out", command]
+        return subprocess.run(cmd, check=True, capture_output=True).stdout
+
+    def close(self):
+        """Close the persistent shell session"""
+        if self._shell_session is not None:
+            self._shell_session.close()
+            self._shell_session = None
+
     def get_screen_size(self) -> Tuple[int, int]:
         """Get screen size using ADB shell command"""
         if not self.device_id:
@@ -158,11 +348,9 @@ class ADBController:
 
         try:
             # Get screen size using wm size command
-            cmd = ["adb", "-s", self.device_id, "shell", "wm", "size"]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            output = self.shell("wm size").strip()
 
             # Parse output like "Physical size: 720x1280"
-            output = result.stdout.strip()
             match = re.search(r"(\d+)x(\d+)", output)
             if match:
                 width = int(match.group(1))
@@ -177,17 +365,65 @@ class ADBController:
             return (0, 0)
 
     def take_screenshot(self) -> Optional[np.ndarray]:
-        """Take screenshot using ADB"""
+        """Take screenshot using ADB as an RGB array.
+
+        Uses the uncompressed `screencap` framebuffer dump when the device
+        supports it and falls back to `screencap -p` (PNG) otherwise.
+        """
         if not self.device_id:
             return None
 
+        if self.raw_screencap:
+            try:
+                data = self.exec_out("screencap")
+            except subprocess.CalledProcessError as e:
+                # A failed call says nothing about raw support, use PNG this once
+                print(f"[ADB] Raw screenshot error: {e}, taking a PNG screenshot")
+                return self._take_png_screenshot()
+
+            img = self._decode_raw_screencap(data)
+            if img is not None:
+                return img
+            # The output is not a framebuffer dump the device can give us
+            print("[ADB] Raw screencap unavailable, falling back to PNG screenshots")
+            self.raw_screencap = False
+
+        return self._take_png_screenshot()
+
+    @classmethod
+    def _decode_raw_screencap(cls, data: bytes) -> Optional[np.ndarray]:
+        """Decode `screencap` output: a width/height/format header and RGBA pixels.
+
+        The header is 12 bytes, or 16 bytes on Android 9+ which appends the
+        color space.
+        """
+        if len(data) < 12:
+            return None
+
+        width, height, pixel_format = struct.unpack_from("<III", data, 0)
+        payload_size = width * height * 4
+        header_size = len(data) - payload_size
+        if (
+            width == 0
+            or height == 0
+            or header_size not in (12, 16)
+            or pixel_format not in cls.RAW_PIXEL_FORMATS
+        ):
+            return None
+
+        rgba = np.frombuffer(
+            data, np.uint8, count=payload_size, offset=header_size
+        ).reshape(height, width, 4)
+        return cv2.cvtColor(rgba, cv2.COLOR_RGBA2RGB)
+
+    def _take_png_screenshot(self) -> Optional[np.ndarray]:
+        """Take screenshot as PNG using `screencap -p`"""
         try:
             # Take screenshot using ADB
-            cmd = ["adb", "-s", self.device_id, "exec-out", "screencap -p"]
-            result = subprocess.run(cmd, check=True, capture_output=True)
+            data = self.exec_out("screencap -p")
 
             # Convert bytes to numpy array
-            nparr = np.frombuffer(result.stdout, np.uint8)
+            nparr = np.frombuffer(data, np.uint8)
             img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
             if img is not None:
@@ -509,19 +745,9 @@ def adb_scroll(distance: int, start_x: int = None, start_y: int = None) -> bool:
                 swipe_end_y = start_y + abs(distance) // 2
 
             # Execute swipe command
-            cmd = [
-                "adb",
-                "-s",
-                controller.device_id,
-                "shell",
-                "input",
-                "swipe",
-                str(start_x),
-                str(swipe_start_y),
-                str(start_x),
-                str(swipe_end_y),
-            ]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            controller.send_input(
+                f"swipe {start_x} {swipe_start_y} {start_x} {swipe_end_y}"
+            )
 
             print(f"[ADB] Scrolled {distance} pixels from ({start_x}, {start_y})")
             return True
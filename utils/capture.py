@@ -0,0 +1,296 @@
+import json
+import threading
+import time
+import itertools
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from utils.adb_utils import get_adb_controller
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+USE_PHONE = config.get("usePhone", True)
+STREAM_CAPTURE = config.get("streamCapture", False)
+# Minimum seconds between the starts of two streamed captures. A raw 720p
+# screencap takes about 50-100 ms, so the default leaves the stream idle
+# about as long as it captures instead of keeping adb busy. 0 captures back
+# to back.
+STREAM_INTERVAL = config.get("streamInterval", 0.1)
+# Seconds a shared snapshot may be reused by state readers when no input was sent
+FRAME_MAX_AGE = config.get("frameMaxAge", 1.0)
+# A screen counts as settled once two captures differ by at most this mean
+# gray level, the first capture starting at least STABLE_MIN_DELAY seconds
+# after the last input so the game had time to react
+STABLE_TOLERANCE = 2.0
+STABLE_MIN_DELAY = 0.1
+
+_frame_sequence = itertools.count(1)
+
+
+class Frame:
+    """One captured phone screen.
+
+    `rgb` is the full screenshot as returned by ADBController.take_screenshot,
+    `seq` increases with every capture and `timestamp` is the time.time() at
+    which the capture was started. BGR, grayscale and downscaled versions are
+    derived on first use and cached on the frame, so every matcher working on
+    the same frame shares them.
+    """
+
+    def __init__(self, rgb: np.ndarray, timestamp: float, seq: Optional[int] = None):
+        self.rgb = rgb
+        self.timestamp = timestamp
+        self.seq = seq if seq is not None else next(_frame_sequence)
+        self._bgr = None
+        self._gray = None
+        self._scaled = {}
+
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """The frame in OpenCV BGR order, converted once"""
+        if self._bgr is None:
+            self._bgr = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2BGR)
+        return self._bgr
+
+    @property
+    def gray(self) -> np.ndarray:
+        """The frame in grayscale, converted once"""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY)
+        return self._gray
+
+    def scaled(self, scale: float) -> np.ndarray:
+        """The BGR frame resized by `scale`, computed once per scale.
+
+        Uses INTER_AREA like imutils.resize so matches stay comparable.
+        """
+        if scale == 1.0:
+            return self.bgr
+        if scale not in self._scaled:
+            height, width = self.rgb.shape[:2]
+            self._scaled[scale] = cv2.resize(
+                self.bgr,
+                (int(width * scale), int(height * scale)),
+                interpolation=cv2.INTER_AREA,
+            )
+        return self._scaled[scale]
+
+
+class FrameStream:
+    """Background capture thread that keeps the newest phone frame at hand.
+
+    Frames are pulled with raw screencaps, at most one per `interval`
+    seconds, and published by replacing a single reference, so readers never
+    take a lock to look at the latest frame. Readers that need a newer frame than the one available wait
+    on a condition that is notified on every publish.
+    """
+
+    def __init__(self, controller, interval: float = STREAM_INTERVAL):
+        self.controller = controller
+        self.interval = interval
+        self._latest = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print("[CAPTURE] Frame streaming started")
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            started = time.time()
+            screenshot = self.controller.take_screenshot()
+            if screenshot is None:
+                time.sleep(0.1)
+                continue
+
+            frame = Frame(screenshot, started)
+            self._latest = frame
+            with self._condition:
+                self._condition.notify_all()
+
+            remaining = self.interval - (time.time() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def latest(self) -> Optional[Frame]:
+        """Return the newest published frame without waiting"""
+        return self._latest
+
+    def wait_for_frame(
+        self, newer_than: float = 0.0, after_seq: int = 0, timeout: float = 2.0
+    ) -> Optional[Frame]:
+        """Return the newest frame whose capture started after `newer_than`
+        and whose sequence number is above `after_seq`, waiting up to `timeout`.
+        """
+
+        def is_fresh(frame):
+            return (
+                frame is not None
+                and frame.timestamp > newer_than
+                and frame.seq > after_seq
+            )
+
+        frame = self._latest
+        if is_fresh(frame):
+            return frame
+
+        deadline = time.time() + timeout
+        with self._condition:
+            while not is_fresh(self._latest):
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._condition.wait(remaining)
+            return self._latest
+
+
+def crop_region(image: np.ndarray, region) -> np.ndarray:
+    """Zero-copy view of `region` (x, y, w, h) in an image array"""
+    x, y, w, h = region
+    return image[y : y + h, x : x + w]
+
+
+_frame_stream = None
+_snapshot = None
+
+
+def get_frame_stream() -> Optional[FrameStream]:
+    """Get the running frame stream, starting it on first use.
+
+    Returns None when streaming is disabled in config or ADB is not connected.
+    """
+    global _frame_stream
+    if not STREAM_CAPTURE:
+        return None
+    if _frame_stream is None:
+        controller = get_adb_controller()
+        if not controller or not controller.is_connected():
+            return None
+        _frame_stream = FrameStream(controller, STREAM_INTERVAL)
+        _frame_stream.start()
+    return _frame_stream
+
+
+def grab_phone_frame(after: Optional[Frame] = None) -> Optional[Frame]:
+    """Get a phone frame that reflects the screen after the last input.
+
+    With streaming enabled this returns the newest streamed frame captured
+    after the last ADB input (and after `after`, when retrying), usually
+    without waiting. Otherwise it takes a synchronous screenshot. The frame
+    also becomes the shared snapshot returned by snapshot_frame().
+    """
+    global _snapshot
+    controller = get_adb_controller()
+    if not controller or not controller.is_connected():
+        return None
+
+    stream = get_frame_stream()
+    if stream is not None:
+        frame = stream.wait_for_frame(
+            newer_than=controller.last_input_time,
+            after_seq=after.seq if after is not None else 0,
+        )
+    else:
+        started = time.time()
+        screenshot = controller.take_screenshot()
+        frame = Frame(screenshot, started) if screenshot is not None else None
+
+    if frame is not None:
+        _snapshot = frame
+    return frame
+
+
+def is_frame_stale(frame: Optional[Frame], max_age: Optional[float] = None) -> bool:
+    """Tell if a frame no longer reflects the screen.
+
+    A frame is stale once it is older than `max_age` seconds (default
+    `frameMaxAge` from config) or when an ADB input was sent after it was
+    captured.
+    """
+    if frame is None:
+        return True
+    if max_age is None:
+        max_age = FRAME_MAX_AGE
+    if frame.age() > max_age:
+        return True
+    controller = get_adb_controller()
+    return controller is not None and frame.timestamp < controller.last_input_time
+
+
+def snapshot_frame(max_age: Optional[float] = None) -> Optional[Frame]:
+    """Get the shared frame snapshot, capturing a new one only when needed.
+
+    State readers call this (or receive its result) so that one capture
+    serves every region read of the same screen. Returns None in desktop
+    mode or when ADB is not connected.
+    """
+    if not USE_PHONE:
+        return None
+    if not is_frame_stale(_snapshot, max_age):
+        return _snapshot
+    return grab_phone_frame()
+
+
+def frame_difference(first: Frame, second: Frame, region=None) -> float:
+    """Mean absolute gray level difference of two frames, inside `region`"""
+    first_gray, second_gray = first.gray, second.gray
+    if region:
+        first_gray = crop_region(first_gray, region)
+        second_gray = crop_region(second_gray, region)
+    return float(cv2.absdiff(first_gray, second_gray).mean())
+
+
+def wait_for_stable_frame(
+    region=None, timeout: float = 1.0, tolerance: float = STABLE_TOLERANCE
+) -> Optional[Frame]:
+    """Capture until the screen (or `region`) stops changing, instead of
+    sleeping a fixed time after an input.
+
+    `region` may also be a list of regions, which must all be settled.
+    Returns the first frame that matches the one before it, or the last
+    frame captured when `timeout` runs out. Returns None in desktop mode or
+    when ADB is not connected.
+    """
+    regions = region if isinstance(region, list) else [region]
+    if not USE_PHONE:
+        return None
+    controller = get_adb_controller()
+    if not controller or not controller.is_connected():
+        return None
+
+    settle = controller.last_input_time + STABLE_MIN_DELAY - time.time()
+    if settle > 0:
+        time.sleep(settle)
+
+    deadline = time.time() + timeout
+    previous = grab_phone_frame()
+    while previous is not None and time.time() < deadline:
+        current = grab_phone_frame(after=previous)
+        if current is None:
+            break
+        if max(frame_difference(previous, current, area) for area in regions) <= tolerance:
+            return current
+        previous = current
+    return previous
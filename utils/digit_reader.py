@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import argparse
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# Read numeric HUD fields with glyph templates before falling back to OCR.
+# Stays idle until a glyph bank is built in DIGITS_DIR, OCR reads meanwhile.
+DIGIT_READER = config.get("digitReader", True)
+# Glyph bank: <char>_<n>.png, '%' is stored as percent_<n>.png. Built from
+# enhanced HUD crops with `python -m utils.digit_reader extract`.
+DIGITS_DIR = os.path.join("assets", "digits")
+GLYPH_NAMES = {"percent": "%"}
+# Every glyph is scaled to this height and centered on a square canvas
+GLYPH_SIZE = 24
+# Smallest correlation with the best template for a glyph to count as read
+MIN_SCORE = 0.75
+# Blobs shorter than this share of the tallest glyph are noise or punctuation
+MIN_HEIGHT_RATIO = 0.5
+# Blobs this much wider than the widest template are touching glyphs
+MAX_WIDTH_RATIO = 1.25
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Otsu threshold with the text as foreground (the minority class)"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def segment(binary: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """Split a binarized field into glyph boxes (x, y, w, h), left to right.
+
+    Glyphs are the runs of columns holding foreground, trimmed to the rows
+    they use. Blobs much shorter than the tallest glyph are dropped.
+    """
+    columns = np.count_nonzero(binary, axis=0) > 0
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], columns.view(np.int8), [0]))))
+    boxes = []
+    for left, right in zip(edges[::2], edges[1::2]):
+        rows = np.flatnonzero(np.count_nonzero(binary[:, left:right], axis=1))
+        boxes.append((int(left), int(rows[0]), int(right - left), int(rows[-1] - rows[0] + 1)))
+    if not boxes:
+        return boxes
+    tallest = max(box[3] for box in boxes)
+    return [box for box in boxes if box[3] >= tallest * MIN_HEIGHT_RATIO]
+
+
+def normalize_glyph(glyph: np.ndarray) -> np.ndarray:
+    """Scale a binary glyph to GLYPH_SIZE rows, keeping its aspect ratio, on a
+    square canvas. Returns a zero-mean, unit-length vector."""
+    height, width = glyph.shape
+    new_width = max(1, min(GLYPH_SIZE, round(width * GLYPH_SIZE / height)))
+    resized = cv2.resize(glyph, (new_width, GLYPH_SIZE), interpolation=cv2.INTER_AREA)
+    canvas = np.zeros((GLYPH_SIZE, GLYPH_SIZE), np.float32)
+    left = (GLYPH_SIZE - new_width) // 2
+    canvas[:, left : left + new_width] = resized
+    vector = canvas.ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class DigitReader:
+    """Reads numbers rendered in the game's fixed HUD font without a neural net.
+
+    A field is binarized, split into glyphs by column projection and every
+    glyph is labelled by correlation with a small bank of templates cut from
+    the game. The score of the weakest glyph is the read's confidence.
+    """
+
+    def __init__(self, folder: str = DIGITS_DIR):
+        self.chars: List[str] = []
+        vectors = []
+        aspects = []
+        if os.path.isdir(folder):
+            for filename in sorted(os.listdir(folder)):
+                if not filename.lower().endswith(".png"):
+                    continue
+                name = filename.rsplit("_", 1)[0]
+                glyph = cv2.imread(os.path.join(folder, filename), cv2.IMREAD_GRAYSCALE)
+                if glyph is None:
+                    print(f"[DIGITS] Could not load glyph: {filename}")
+                    continue
+                binary = binarize(glyph)
+                boxes = segment(binary)
+                if len(boxes) != 1:
+                    print(f"[DIGITS] {filename} holds {len(boxes)} glyphs, skipped")
+                    continue
+                x, y, w, h = boxes[0]
+                self.chars.append(GLYPH_NAMES.get(name, name))
+                vectors.append(normalize_glyph(binary[y : y + h, x : x + w]))
+                aspects.append(w / h)
+        self.templates = np.array(vectors, dtype=np.float32).reshape(
+            len(vectors), GLYPH_SIZE * GLYPH_SIZE
+        )
+        self.max_aspect = max(aspects, default=1.0) * MAX_WIDTH_RATIO
+
+    def _split(self, binary: np.ndarray, box: Tuple[int, int, int, int]) -> List[tuple]:
+        """Cut a blob of touching glyphs at its thinnest column, recursively"""
+        x, y, w, h = box
+        if w <= h * self.max_aspect or w < 4:
+            return [box]
+        columns = np.count_nonzero(binary[y : y + h, x : x + w], axis=0)
+        low, high = w * 3 // 10, w * 7 // 10
+        cut = low + int(np.argmin(columns[low : high + 1]))
+        return self._split(binary, (x, y, cut, h)) + self._split(
+            binary, (x + cut, y, w - cut, h)
+        )
+
+    def _trim(self, binary: np.ndarray, box: Tuple[int, int, int, int]) -> tuple:
+        x, y, w, h = box
+        rows = np.flatnonzero(np.count_nonzero(binary[y : y + h, x : x + w], axis=1))
+        if not len(rows):
+            return box
+        return (x, y + int(rows[0]), w, int(rows[-1] - rows[0] + 1))
+
+    def glyphs(self, gray: np.ndarray) -> List[Tuple[str, float]]:
+        """(char, score) of every glyph in a grayscale field, left to right"""
+        if not self.chars:
+            return []
+        binary = binarize(gray)
+        boxes = [
+            self._trim(binary, part) for box in segment(binary) for part in self._split(binary, box)
+        ]
+        if not boxes:
+            return []
+        vectors = np.array(
+            [normalize_glyph(binary[y : y + h, x : x + w]) for x, y, w, h in boxes]
+        )
+        scores = vectors @ self.templates.T
+        best = scores.argmax(axis=1)
+        return [
+            (self.chars[index], float(scores[row, index])) for row, index in enumerate(best)
+        ]
+
+    def read_number(
+        self, gray: np.ndarray, suffix: Optional[str] = None, whole: bool = True
+    ) -> Tuple[Optional[int], float]:
+        """Read a number from a grayscale field, returns (value, confidence).
+
+        With `whole` every glyph must be a confidently read digit (plus the
+        `suffix`, e.g. '%', at the end). Otherwise the number is the last run
+        of confident digits (ending with `suffix` when given), so labels in
+        another font around it are ignored. Value is None when nothing
+        qualifies.
+        """
+        glyphs = self.glyphs(gray)
+        if suffix is not None:
+            ends = [i for i, (char, score) in enumerate(glyphs) if char == suffix and score >= MIN_SCORE]
+            if not ends or (whole and ends[-1] != len(glyphs) - 1):
+                return None, 0.0
+            suffix_score = glyphs[ends[-1]][1]
+            glyphs = glyphs[: ends[-1]]
+        else:
+            suffix_score = 1.0
+
+        run: List[Tuple[str, float]] = []
+        for char, score in reversed(glyphs):
+            if char.isdigit() and score >= MIN_SCORE:
+                run.insert(0, (char, score))
+            elif run or suffix is not None or whole:
+                break
+        if not run or (whole and len(run) != len(glyphs)):
+            return None, 0.0
+        confidence = min(suffix_score, min(score for _, score in run))
+        return int("".join(char for char, _ in run)), confidence
+
+
+_digit_reader: Optional[DigitReader] = None
+
+
+def get_digit_reader() -> Optional[DigitReader]:
+    """Get the shared digit reader, None when disabled or the bank is empty"""
+    global _digit_reader
+    if not DIGIT_READER:
+        return None
+    if _digit_reader is None:
+        _digit_reader = DigitReader()
+        if _digit_reader.chars:
+            print(f"[DIGITS] Loaded {len(_digit_reader.chars)} glyph templates")
+    return _digit_reader if _digit_reader.chars else None
+
+
+def read_number(image, suffix: Optional[str] = None, whole: bool = True) -> Optional[int]:
+    """Read a number from an enhanced HUD crop (PIL image or array) with the
+    glyph bank, None when it is unavailable or not confident"""
+    reader = get_digit_reader()
+    if reader is None:
+        return None
+    gray = np.asarray(image)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    value, _ = reader.read_number(gray, suffix=suffix, whole=whole)
+    return value
+
+
+def extract_glyphs(image_path: str, text: str, folder: str = DIGITS_DIR) -> int:
+    """Cut the glyphs of a crop showing `text` (spaces ignored) into the bank"""
+    gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        print(f"[DIGITS] Could not read {image_path}")
+        return 0
+    chars = [char for char in text if not char.isspace()]
+    boxes = segment(binarize(gray))
+    if len(boxes) != len(chars):
+        print(f"[DIGITS] {image_path}: found {len(boxes)} glyphs for {len(chars)} characters")
+        return 0
+
+    os.makedirs(folder, exist_ok=True)
+    names = {char: name for name, char in GLYPH_NAMES.items()}
+    for char, (x, y, w, h) in zip(chars, boxes):
+        name = names.get(char, char)
+        index = 1
+        while os.path.exists(os.path.join(folder, f"{name}_{index}.png")):
+            index += 1
+        glyph = gray[max(y - 2, 0) : y + h + 2, max(x - 2, 0) : x + w + 2]
+        cv2.imwrite(os.path.join(folder, f"{name}_{index}.png"), glyph)
+    return len(chars)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or test the HUD digit glyph bank")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser(
+        "extract", help="Add the glyphs of an enhanced HUD crop showing TEXT to the bank"
+    )
+    extract_parser.add_argument("image")
+    extract_parser.add_argument("text")
+
+    read_parser = subparsers.add_parser("read", help="Read numbers from enhanced HUD crops")
+    read_parser.add_argument("images", nargs="+")
+    read_parser.add_argument("--suffix", help="Character ending the number, e.g. %%")
+
+    args = parser.parse_args()
+    if args.command == "extract":
+        added = extract_glyphs(args.image, args.text)
+        print(f"[DIGITS] Added {added} glyphs to {DIGITS_DIR}")
+        return
+
+    reader = DigitReader()
+    if not reader.chars:
+        print(f"[DIGITS] No glyphs in {DIGITS_DIR}, extract some first")
+        sys.exit(1)
+    for path in args.images:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            print(f"[DIGITS] Could not read {path}")
+            continue
+        start = time.perf_counter()
+        value, confidence = reader.read_number(gray, suffix=args.suffix, whole=False)
+        elapsed = (time.perf_counter() - start) * 1000
+        glyphs = " ".join(f"{char}:{score:.2f}" for char, score in reader.glyphs(gray))
+        print(f"{path}: {value} (confidence {confidence:.2f}, {elapsed:.3f} ms) [{glyphs}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,13 @@ import os
 import time
 from datetime import datetime
 
+from utils.capture import grab_phone_frame, is_frame_stale, snapshot_frame
+from utils.templates import get_template_bank, load_template
+from utils.pyramid import coarse_factor, pyramid_match
+from utils.nms import iou_suppress, peak_points
+from utils.match_executor import run_parallel
+from utils.location_priors import get_location_priors
+
 # Load config
 try:
     with open("config.json", "r", encoding="utf-8") as file:
@@ -16,6 +23,218 @@ except FileNotFoundError:
 
 USE_PHONE = config.get("usePhone", True)
 BEST_SCALES = 0.8
+# How far a prior window match must clear the confidence to skip the full search
+PRIOR_MARGIN = 0.05
+
+def next_phone_frame(supplied_frame, last_frame):
+    """Use the caller's frame on the first attempt, then poll fresh phone frames.
+
+    A supplied frame captured before the last ADB input is skipped.
+    """
+    if (
+        supplied_frame is not None
+        and last_frame is None
+        and not is_frame_stale(supplied_frame, max_age=float("inf"))
+    ):
+        return supplied_frame
+    return grab_phone_frame(after=last_frame)
+
+
+def scaled_search_area(frame, region, scale):
+    """Cut the search area out of the frame's cached downscaled copy.
+
+    Returns (image, offset_x, offset_y) where the offsets place the crop in
+    the scaled frame, so match positions map back to the full screen with
+    (position + offset) / scale.
+    """
+    scaled = frame.scaled(scale)
+    if not region:
+        return scaled, 0, 0
+
+    x, y, w, h = region
+    left, top = int(x * scale), int(y * scale)
+    right, bottom = int((x + w) * scale), int((y + h) * scale)
+    return scaled[top:bottom, left:right], left, top
+
+
+def best_match_on_frame(frame, template, region=None, scale=BEST_SCALES):
+    """Find the best match of a BGR template in a frame.
+
+    The template is matched against the frame's cached copy downscaled by
+    `scale`. Returns (confidence, (left, top, width, height)) with the box in
+    full-screen coordinates, or (0, None) if the search area is smaller than
+    the template.
+    """
+    (tH, tW) = template.shape[:2]
+    resized, offset_x, offset_y = scaled_search_area(frame, region, scale)
+
+    # If the resized image is smaller than the template there is nothing to match
+    if resized.shape[0] < tH or resized.shape[1] < tW:
+        return 0, None
+
+    result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
+    (_, max_val, _, max_loc) = cv2.minMaxLoc(result)
+    return max_val, screen_box(max_loc, (tW, tH), offset_x, offset_y, scale)
+
+
+def screen_box(position, size, offset_x, offset_y, scale):
+    """Map a match position in a scaled search area back to a full-screen
+    (left, top, width, height) box"""
+    r = 1 / scale
+    start_x = int((position[0] + offset_x) * r)
+    start_y = int((position[1] + offset_y) * r)
+    end_x = int((position[0] + offset_x + size[0]) * r)
+    end_y = int((position[1] + offset_y + size[1]) * r)
+    return (start_x, start_y, end_x - start_x, end_y - start_y)
+
+
+def pyramid_match_on_frame(
+    frame, template_path, threshold, region=None, scale=BEST_SCALES, top_k=4
+):
+    """Coarse-to-fine match of a template on a frame (see utils/pyramid.py).
+
+    The coarse pass runs on the frame's cached copy shrunk a further 2-8x and
+    only the best `top_k` candidates are correlated at `scale`. Returns a
+    list of (confidence, box) at or above `threshold`, best first, with boxes
+    in full-screen coordinates like best_match_on_frame.
+    """
+    template = get_template_bank().get(template_path)
+    if template is None:
+        return []
+
+    resized, offset_x, offset_y = scaled_search_area(frame, region, scale)
+    factor = coarse_factor(template.bgr.shape)
+    if factor is None:
+        matches = pyramid_match(resized, template.bgr, threshold, top_k)
+    else:
+        coarse, coarse_x, coarse_y = scaled_search_area(frame, region, scale * factor)
+        matches = pyramid_match(
+            resized,
+            template.bgr,
+            threshold,
+            top_k,
+            coarse_image=coarse,
+            coarse_template=template.scaled(factor),
+            factor=factor,
+            shift=(coarse_x / factor - offset_x, coarse_y / factor - offset_y),
+        )
+
+    size = (template.width, template.height)
+    return [
+        (score, screen_box((x, y), size, offset_x, offset_y, scale))
+        for score, x, y in matches
+    ]
+
+
+def find_on_frame(
+    frame, template_path, template, confidence, region=None, pyramid=False
+):
+    """Best match of a template, searching around its past locations first.
+
+    Windows around the template's previous hits (see utils/location_priors.py)
+    are tried before the full search area; the best window match is returned
+    right away when it clears `confidence` by PRIOR_MARGIN, a marginal one is
+    compared with the full search. Full-area matches at or above
+    `confidence` are recorded as new priors. With `pyramid` the full area is
+    searched coarse-to-fine. Returns (confidence, box) like
+    best_match_on_frame.
+    """
+    from utils.adb_utils import get_adb_controller
+
+    def search_full_area():
+        if pyramid:
+            matches = pyramid_match_on_frame(frame, template_path, confidence, region)
+            return matches[0] if matches else (0, None)
+        return best_match_on_frame(frame, template, region)
+
+    controller = get_adb_controller()
+    priors = get_location_priors(
+        controller.device_id if controller else None, frame.rgb.shape
+    )
+    if priors is None:
+        return search_full_area()
+
+    windows = priors.windows(template_path, frame.rgb.shape, region)
+    best_score, best_box = 0, None
+    for window in windows:
+        score, box = best_match_on_frame(frame, template, window)
+        if box is not None and score > best_score:
+            best_score, best_box = score, box
+    if best_box is not None and best_score >= confidence + PRIOR_MARGIN:
+        priors.count(template_path, "prior_hit")
+        priors.record_hit(template_path, best_box)
+        return best_score, best_box
+    priors.count(template_path, "prior_miss" if windows else "no_prior")
+
+    # A marginal window match may be a lookalike near an old location, the
+    # full search decides
+    score, box = search_full_area()
+    if best_box is not None and best_score > score:
+        score, box = best_score, best_box
+    if box is not None and score >= confidence:
+        priors.record_hit(template_path, box)
+    return score, box
+
+
+class Detection:
+    """Match location similar to pyautogui's locate result, plus its score"""
+
+    def __init__(self, left, top, width, height, score=1.0):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.x = left + width // 2
+        self.y = top + height // 2
+        self.score = score
+
+    def __repr__(self):
+        return f"Detection(x={self.x}, y={self.y}, score={self.score:.3f})"
+
+
+def detect_templates(templates, region=None, frame=None):
+    """Evaluate many templates against one screen in a single pass.
+
+    `templates` maps a name to a (template_path, confidence) pair. Every
+    template is matched against the same frame (the shared snapshot unless
+    `frame` is given), in parallel on the match executor. Returns a dict
+    mapping each name to a Detection with its score, or None when it is not
+    on screen.
+    """
+    if not USE_PHONE:
+        results = {}
+        for name, (template_path, confidence) in templates.items():
+            location = locate_on_desktop(template_path, confidence, 0, region)
+            results[name] = (
+                Detection(location.left, location.top, location.width, location.height)
+                if location
+                else None
+            )
+        return results
+
+    frame = frame or snapshot_frame()
+    if frame is None:
+        print("[WARNING] Could not take phone screenshot for batch detection")
+        return {name: None for name in templates}
+
+    def detect(template_path, confidence):
+        template = load_template(template_path)
+        if template is None:
+            print(f"[ERROR] Could not load template: {template_path}")
+            return None
+
+        score, box = find_on_frame(frame, template_path, template, confidence, region)
+        return Detection(*box, score=score) if box is not None and score >= confidence else None
+
+    # Build the shared downscaled copy once instead of racing for it in every job
+    frame.scaled(BEST_SCALES)
+    return run_parallel(
+        {
+            name: (lambda path=template_path, conf=confidence: detect(path, conf))
+            for name, (template_path, confidence) in templates.items()
+        }
+    )
+
 
 def save_debug_image(
     screenshot,
@@ -62,14 +281,28 @@ def save_debug_image(
 
 
 def locate_center_on_screen(
-    template_path, confidence=0.8, min_search_time=0.2, region=None, name=None, debug=False
+    template_path,
+    confidence=0.8,
+    min_search_time=0.2,
+    region=None,
+    name=None,
+    debug=False,
+    frame=None,
+    pyramid=False,
 ):
     """
     Locate template image on screen, works with both desktop and phone screenshots
     """
     if USE_PHONE:
         return locate_center_on_phone(
-            template_path, confidence, min_search_time, region, name, debug
+            template_path,
+            confidence,
+            min_search_time,
+            region,
+            name,
+            debug,
+            frame,
+            pyramid,
         )
     else:
         return locate_center_on_desktop(
@@ -78,12 +311,22 @@ def locate_center_on_screen(
 
 
 def locate_center_on_phone(
-    template_path, confidence=0.8, min_search_time=1, region=None, name=None, debug=False
+    template_path,
+    confidence=0.8,
+    min_search_time=1,
+    region=None,
+    name=None,
+    debug=False,
+    frame=None,
+    pyramid=False,
 ):
-    """Locate template image on phone screenshot using improved OpenCV + imutils"""
+    """Locate template image on phone screenshot using OpenCV template matching.
+
+    `pyramid` searches coarse-to-fine, worth it for small templates searched
+    over large areas.
+    """
     try:
         from utils.adb_utils import get_adb_controller
-        import imutils
 
         controller = get_adb_controller()
 
@@ -95,13 +338,13 @@ def locate_center_on_phone(
 
         start_time = time.time()
         max_search_time = min_search_time
+        last_frame = None
 
         while time.time() - start_time < max_search_time:
             # Take phone screenshot
-            screenshot = controller.take_screenshot()
+            last_frame = next_phone_frame(frame, last_frame)
 
-            # Convert RGB to BGR for cv2.imwrite
-            if screenshot is None:
+            if last_frame is None:
                 print(
                     "[WARNING] Could not take phone screenshot, falling back to desktop"
                 )
@@ -109,86 +352,36 @@ def locate_center_on_phone(
                     template_path, confidence, min_search_time, region
                 )
 
-            # Convert to OpenCV format
-            screenshot_cv = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
-
             # Load template
-            template = cv2.imread(template_path, cv2.IMREAD_COLOR)
+            template = load_template(template_path)
             if template is None:
                 print(f"[ERROR] Could not load template: {template_path}")
                 return None
 
-            # Crop screenshot to region if specified
-            if region:
-                x, y, w, h = region
-                screenshot_cv = screenshot_cv[y : y + h, x : x + w]
-
-            # Use imutils for better template matching with multiple scales
-            # This improves detection accuracy significantly
-            (tH, tW) = template.shape[:2]
-
-            # Try multiple scales for better detection
-            scales = [BEST_SCALES]
-            best_match = None
-            best_confidence = 0
-            best_scale = 1.0
-
-            for scale in scales:
-                # Resize the image according to the scale
-                resized = imutils.resize(
-                    screenshot_cv, width=int(screenshot_cv.shape[1] * scale)
-                )
-                r = screenshot_cv.shape[1] / float(resized.shape[1])
-
-                # If the resized image is smaller than the template, break
-                if resized.shape[0] < tH or resized.shape[1] < tW:
-                    break
-
-                # Apply template matching
-                result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
-                (_, maxVal, _, maxLoc) = cv2.minMaxLoc(result)
-
-                # If we have found a new maximum correlation value, then update
-                if maxVal > best_confidence:
-                    best_confidence = maxVal
-                    best_scale = scale
-                    best_match = maxLoc
-                    best_r = r
+            best_confidence, best_box = find_on_frame(
+                last_frame, template_path, template, confidence, region, pyramid
+            )
 
             if debug:
                 print(f"[PHONE] Best confidence for {template_path}: {best_confidence:.3f}")
             # If we found a match above our confidence threshold
-            if best_confidence >= confidence:
+            if best_box is not None and best_confidence >= confidence:
                 # Calculate the center point
-                (startX, startY) = (
-                    int(best_match[0] * best_r),
-                    int(best_match[1] * best_r),
-                )
-                (endX, endY) = (
-                    int((best_match[0] + tW) * best_r),
-                    int((best_match[1] + tH) * best_r),
-                )
-
-                center_x = startX + (endX - startX) // 2
-                center_y = startY + (endY - startY) // 2
-
-                # Adjust coordinates if region was specified
-                if region:
-                    center_x += region[0]
-                    center_y += region[1]
+                startX, startY, width, height = best_box
+                center_x = startX + width // 2
+                center_y = startY + height // 2
 
                 # print(
-                #     f"[PHONE] Found {template_path} at ({center_x}, {center_y}) with confidence {best_confidence:.3f} (scale: {best_scale})"
+                #     f"[PHONE] Found {template_path} at ({center_x}, {center_y}) with confidence {best_confidence:.3f}"
                 # )
 
                 # Save debug images for manual verification
                 if config.get("saveDebugImages", False) or debug:
                     print(f"[DEBUG] Saving debug images for {name}")
-                    match_location = (startX, startY, endX - startX, endY - startY)
                     save_debug_image(
-                        screenshot_cv,
+                        last_frame.bgr,
                         template,
-                        match_location,
+                        best_box,
                         best_confidence,
                         template_path,
                         name
@@ -228,21 +421,24 @@ def locate_center_on_desktop(
         return None
 
 
-def locate_on_screen(template_path, confidence=0.8, min_search_time=0.2, region=None):
+def locate_on_screen(
+    template_path, confidence=0.8, min_search_time=0.2, region=None, frame=None
+):
     """
     Locate template image on screen (returns full location), works with both desktop and phone screenshots
     """
     if USE_PHONE:
-        return locate_on_phone(template_path, confidence, min_search_time, region)
+        return locate_on_phone(template_path, confidence, min_search_time, region, frame)
     else:
         return locate_on_desktop(template_path, confidence, min_search_time, region)
 
 
-def locate_on_phone(template_path, confidence=0.8, min_search_time=0.2, region=None):
-    """Locate template image on phone screenshot using improved OpenCV + imutils"""
+def locate_on_phone(
+    template_path, confidence=0.8, min_search_time=0.2, region=None, frame=None
+):
+    """Locate template image on phone screenshot using OpenCV template matching"""
     try:
         from utils.adb_utils import get_adb_controller
-        import imutils
 
         controller = get_adb_controller()
 
@@ -252,11 +448,12 @@ def locate_on_phone(template_path, confidence=0.8, min_search_time=0.2, region=N
 
         start_time = time.time()
         max_search_time = min_search_time
+        last_frame = None
 
         while time.time() - start_time < max_search_time:
             # Take phone screenshot
-            screenshot = controller.take_screenshot()
-            if screenshot is None:
+            last_frame = next_phone_frame(frame, last_frame)
+            if last_frame is None:
                 print(
                     "[WARNING] Could not take phone screenshot, falling back to desktop"
                 )
@@ -264,95 +461,29 @@ def locate_on_phone(template_path, confidence=0.8, min_search_time=0.2, region=N
                     template_path, confidence, min_search_time, region
                 )
 
-            # Convert to OpenCV format
-            screenshot_cv = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
-
             # Load template
-            template = cv2.imread(template_path, cv2.IMREAD_COLOR)
+            template = load_template(template_path)
             if template is None:
                 print(f"[ERROR] Could not load template: {template_path}")
                 return None
 
-            # Crop screenshot to region if specified
-            if region:
-                x, y, w, h = region
-                screenshot_cv = screenshot_cv[y : y + h, x : x + w]
-
-            # Use imutils for better template matching with multiple scales
-            (tH, tW) = template.shape[:2]
-
-            # Try multiple scales for better detection
-            scales = [BEST_SCALES]
-            best_match = None
-            best_confidence = 0
-            best_scale = 1.0
-
-            for scale in scales:
-                # Resize the image according to the scale
-                resized = imutils.resize(
-                    screenshot_cv, width=int(screenshot_cv.shape[1] * scale)
-                )
-                r = screenshot_cv.shape[1] / float(resized.shape[1])
-
-                # If the resized image is smaller than the template, break
-                if resized.shape[0] < tH or resized.shape[1] < tW:
-                    break
-
-                # Apply template matching
-                result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
-                (_, maxVal, _, maxLoc) = cv2.minMaxLoc(result)
-
-                # If we have found a new maximum correlation value, then update
-                if maxVal > best_confidence:
-                    best_confidence = maxVal
-                    best_scale = scale
-                    best_match = maxLoc
-                    best_r = r
+            best_confidence, best_box = find_on_frame(
+                last_frame, template_path, template, confidence, region
+            )
 
             # If we found a match above our confidence threshold
-            if best_confidence >= confidence:
-                # Calculate the location
-                (startX, startY) = (
-                    int(best_match[0] * best_r),
-                    int(best_match[1] * best_r),
-                )
-                (endX, endY) = (
-                    int((best_match[0] + tW) * best_r),
-                    int((best_match[1] + tH) * best_r),
-                )
-
-                left = startX
-                top = startY
-                width = endX - startX
-                height = endY - startY
-
-                # Adjust coordinates if region was specified
-                if region:
-                    left += region[0]
-                    top += region[1]
-
+            if best_box is not None and best_confidence >= confidence:
                 # print(
-                #     f"[PHONE] Found {template_path} at ({left}, {top}, {width}, {height}) with confidence {best_confidence:.3f} (scale: {best_scale})"
+                #     f"[PHONE] Found {template_path} at {best_box} with confidence {best_confidence:.3f}"
                 # )
-
-                # Create a mock object similar to pyautogui's locate result
-                class MockLocation:
-                    def __init__(self, left, top, width, height):
-                        self.left = left
-                        self.top = top
-                        self.width = width
-                        self.height = height
-                        self.x = left + width // 2
-                        self.y = top + height // 2
-
-                return MockLocation(left, top, width, height)
+                return Detection(*best_box, score=best_confidence)
 
             # If no match found and we still have time, wait a bit before retrying
             if time.time() - start_time < max_search_time:
                 time.sleep(0.05)  # Small delay between retries
 
         # If we reach here, no match was found within the time limit
-        # print(f"[PHONE] {template_path} not found within {min_search_time}s (best confidence: {best_confidence:.3f})")
+        # print(f"[PHONE] {template_path} not found within {min_search_time}s")
         return None
 
     except Exception as e:
@@ -380,12 +511,16 @@ def locate_on_desktop(template_path, confidence=0.8, min_search_time=0.2, region
 
 
 def locate_all_centers_on_phone(
-    template_path, confidence=0.8, min_search_time=1, region=None, max_matches=10
+    template_path,
+    confidence=0.8,
+    min_search_time=1,
+    region=None,
+    max_matches=10,
+    frame=None,
 ):
     """Locate all template images on phone screenshot that meet confidence threshold"""
     try:
         from utils.adb_utils import get_adb_controller
-        import imutils
 
         controller = get_adb_controller()
 
@@ -395,10 +530,12 @@ def locate_all_centers_on_phone(
 
         start_time = time.time()
         max_search_time = min_search_time
+        last_frame = None
 
         while time.time() - start_time < max_search_time:
             # Take phone screenshot
-            screenshot = controller.take_screenshot()
+            last_frame = next_phone_frame(frame, last_frame)
+            screenshot = last_frame.rgb if last_frame is not None else None
 
             # Convert RGB to BGR for cv2.imwrite
             if screenshot is None:
@@ -407,21 +544,12 @@ def locate_all_centers_on_phone(
                 )
                 return []
 
-            # Convert to OpenCV format
-            screenshot_cv = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
-
             # Load template
-            template = cv2.imread(template_path, cv2.IMREAD_COLOR)
+            template = load_template(template_path)
             if template is None:
                 print(f"[ERROR] Could not load template: {template_path}")
                 return []
 
-            # Crop screenshot to region if specified
-            if region:
-                x, y, w, h = region
-                screenshot_cv = screenshot_cv[y : y + h, x : x + w]
-
-            # Use imutils for better template matching with multiple scales
             (tH, tW) = template.shape[:2]
 
             # Try multiple scales for better detection
@@ -429,11 +557,11 @@ def locate_all_centers_on_phone(
             all_matches = []  # Store all matches above confidence threshold
 
             for scale in scales:
-                # Resize the image according to the scale
-                resized = imutils.resize(
-                    screenshot_cv, width=int(screenshot_cv.shape[1] * scale)
+                # Reuse the frame's downscaled copy instead of resizing per template
+                resized, offset_x, offset_y = scaled_search_area(
+                    last_frame, region, scale
                 )
-                r = screenshot_cv.shape[1] / float(resized.shape[1])
+                r = 1 / scale
 
                 # If the resized image is smaller than the template, break
                 if resized.shape[0] < tH or resized.shape[1] < tW:
@@ -442,30 +570,25 @@ def locate_all_centers_on_phone(
                 # Apply template matching
                 result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
                 
-                # Find all locations where the correlation exceeds the threshold
-                locations = np.where(result >= confidence)
+                # Find the local peaks where the correlation exceeds the threshold
+                xs, ys, peak_scores = peak_points(result, confidence)
                 
-                for pt in zip(*locations[::-1]):  # Switch columns and rows
-                    match_confidence = result[pt[1], pt[0]]
-                    
+                for pt_x, pt_y, match_confidence in zip(xs, ys, peak_scores):
+                    match_x, match_y = pt_x + offset_x, pt_y + offset_y
+
                     # Calculate the center point for this match
                     (startX, startY) = (
-                        int(pt[0] * r),
-                        int(pt[1] * r),
+                        int(match_x * r),
+                        int(match_y * r),
                     )
                     (endX, endY) = (
-                        int((pt[0] + tW) * r),
-                        int((pt[1] + tH) * r),
+                        int((match_x + tW) * r),
+                        int((match_y + tH) * r),
                     )
 
                     center_x = startX + (endX - startX) // 2
                     center_y = startY + (endY - startY) // 2
 
-                    # Adjust coordinates if region was specified
-                    if region:
-                        center_x += region[0]
-                        center_y += region[1]
-
                     all_matches.append({
                         'confidence': match_confidence,
                         'scale': scale,
@@ -511,51 +634,15 @@ def non_maximum_suppression(matches, overlap_threshold=0.3):
         overlap_threshold: IoU threshold for considering detections as overlapping
     
     Returns:
-        List of matches with overlapping detections removed
+        List of matches with overlapping detections removed, highest confidence first
     """
     if not matches:
         return []
-    
-    # Sort by confidence (highest first)
-    matches = sorted(matches, key=lambda x: x['confidence'], reverse=True)
-    
-    # Calculate IoU between bounding boxes
-    def calculate_iou(box1, box2):
-        """Calculate Intersection over Union between two bounding boxes"""
-        x1, y1, w1, h1 = box1
-        x2, y2, w2, h2 = box2
-        
-        # Calculate intersection
-        x_left = max(x1, x2)
-        y_top = max(y1, y2)
-        x_right = min(x1 + w1, x2 + w2)
-        y_bottom = min(y1 + h1, y2 + h2)
-        
-        if x_right < x_left or y_bottom < y_top:
-            return 0.0
-        
-        intersection = (x_right - x_left) * (y_bottom - y_top)
-        
-        # Calculate union
-        area1 = w1 * h1
-        area2 = w2 * h2
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0.0
-    
-    # Apply non-maximum suppression
-    kept_matches = []
-    
-    for match in matches:
-        should_keep = True
-        
-        for kept_match in kept_matches:
-            iou = calculate_iou(match['location'], kept_match['location'])
-            if iou > overlap_threshold:
-                should_keep = False
-                break
-        
-        if should_keep:
-            kept_matches.append(match)
-    
-    return kept_matches
+
+    # Vectorized IoU suppression, see utils/nms.py
+    keep = iou_suppress(
+        [match['location'] for match in matches],
+        [match['confidence'] for match in matches],
+        overlap_threshold,
+    )
+    return [matches[i] for i in keep]
@@ -0,0 +1,155 @@
+import os
+import re
+import json
+import time
+import atexit
+import threading
+from typing import Dict, List, Optional
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+LOCATION_PRIORS = config.get("locationPriors", True)
+PRIORS_DIR = "cache"
+
+
+class LocationPriors:
+    """Remembers where each template was last found on one device/resolution.
+
+    Matchers first correlate a template inside small padded windows around its
+    past hits and only search the full area when none of them clearly match. Hit and
+    miss counters tell how often the full-frame search was avoided.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        padding: int = 24,
+        max_hits: int = 4,
+        save_interval: float = 10.0,
+    ):
+        self.path = path
+        self.padding = padding
+        self.max_hits = max_hits
+        self.save_interval = save_interval
+        self.hits: Dict[str, List[List[int]]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._dirty = False
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                self.hits = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.hits = {}
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(self.hits, file, indent=2)
+            self._dirty = False
+            self._last_save = time.time()
+
+    def windows(self, name: str, frame_shape, region=None) -> List[tuple]:
+        """Padded search windows (x, y, w, h) around past hits, clipped to the
+        frame and to `region` when one is given"""
+        height, width = frame_shape[:2]
+        bounds = region or (0, 0, width, height)
+        windows = []
+        for x, y, w, h in self.hits.get(name, []):
+            left = max(x - self.padding, bounds[0], 0)
+            top = max(y - self.padding, bounds[1], 0)
+            right = min(x + w + self.padding, bounds[0] + bounds[2], width)
+            bottom = min(y + h + self.padding, bounds[1] + bounds[3], height)
+            if right - left >= w and bottom - top >= h:
+                windows.append((left, top, right - left, bottom - top))
+        return windows
+
+    def record_hit(self, name: str, box):
+        """Remember a match location, most recent first"""
+        box = [int(v) for v in box]
+        with self._lock:
+            past = [
+                hit
+                for hit in self.hits.get(name, [])
+                if abs(hit[0] - box[0]) > 4 or abs(hit[1] - box[1]) > 4
+            ]
+            self.hits[name] = [box] + past[: self.max_hits - 1]
+            self._dirty = True
+        if time.time() - self._last_save > self.save_interval:
+            self.save()
+
+    def count(self, name: str, outcome: str):
+        """Count a 'prior_hit', 'prior_miss' or 'no_prior' search for a template"""
+        with self._lock:
+            counters = self.stats.setdefault(
+                name, {"prior_hit": 0, "prior_miss": 0, "no_prior": 0}
+            )
+            counters[outcome] += 1
+
+    def summary(self) -> Dict[str, int]:
+        """Totals over all templates, with the share of searches that skipped
+        the full frame"""
+        totals = {"prior_hit": 0, "prior_miss": 0, "no_prior": 0}
+        with self._lock:
+            for counters in self.stats.values():
+                for key, value in counters.items():
+                    totals[key] += value
+        searches = sum(totals.values())
+        totals["saved_ratio"] = totals["prior_hit"] / searches if searches else 0.0
+        return totals
+
+
+_location_priors: Dict[tuple, LocationPriors] = {}
+_location_priors_lock = threading.Lock()
+
+
+def get_location_priors(device_id: Optional[str], frame_shape) -> Optional[LocationPriors]:
+    """Get the priors for a device and screen resolution, None when disabled"""
+    if not LOCATION_PRIORS:
+        return None
+
+    height, width = frame_shape[:2]
+    key = (device_id or "unknown", width, height)
+    # Matchers call this from the match executor's threads
+    with _location_priors_lock:
+        if key not in _location_priors:
+            device = re.sub(r"[^\w.-]", "_", key[0])
+            path = os.path.join(PRIORS_DIR, f"location_priors_{device}_{width}x{height}.json")
+            _location_priors[key] = LocationPriors(path)
+        return _location_priors[key]
+
+
+def print_location_prior_stats():
+    """Print hit/miss statistics of every loaded prior index"""
+    with _location_priors_lock:
+        loaded = list(_location_priors.items())
+    for (device, width, height), priors in loaded:
+        totals = priors.summary()
+        print(
+            f"[PRIORS] {device} {width}x{height}: {totals['prior_hit']} hits, "
+            f"{totals['prior_miss']} misses, {totals['no_prior']} without prior "
+            f"({totals['saved_ratio']:.0%} of searches skipped the full area)"
+        )
+
+
+@atexit.register
+def _save_all_priors():
+    print_location_prior_stats()
+    with _location_priors_lock:
+        loaded = list(_location_priors.values())
+    for priors in loaded:
+        try:
+            priors.save()
+        except OSError as e:
+            print(f"[PRIORS] Could not save {priors.path}: {e}")
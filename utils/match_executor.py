@@ -0,0 +1,72 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# Threads used for template matching, 0 picks one per core (up to 4).
+# Lower it when several bot instances share one host.
+MATCH_WORKERS = config.get("matchWorkers", 0)
+
+
+class MatchExecutor:
+    """Bounded thread pool that runs independent matching jobs side by side.
+
+    cv2.matchTemplate releases the GIL, so template/region searches on the
+    same frame scale across cores. Jobs submitted from inside a worker run
+    inline, so nested fan-outs cannot starve the pool. With a single worker
+    everything runs inline in submission order.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._pool = (
+            ThreadPoolExecutor(self.workers, thread_name_prefix="match")
+            if self.workers > 1
+            else None
+        )
+        self._local = threading.local()
+
+    def _run_job(self, job: Callable):
+        self._local.in_worker = True
+        try:
+            return job()
+        finally:
+            self._local.in_worker = False
+
+    def run(self, jobs: Dict[Hashable, Callable]) -> Dict[Hashable, object]:
+        """Run every job (a no-argument callable) and return their results
+        under the same keys. Exceptions raised by a job are re-raised here."""
+        if self._pool is None or len(jobs) < 2 or getattr(self._local, "in_worker", False):
+            return {key: job() for key, job in jobs.items()}
+
+        futures = {key: self._pool.submit(self._run_job, job) for key, job in jobs.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+_match_executor = None
+
+
+def get_match_executor() -> MatchExecutor:
+    """Get or create the shared match executor sized by `matchWorkers`"""
+    global _match_executor
+    if _match_executor is None:
+        workers = MATCH_WORKERS or min(4, os.cpu_count() or 1)
+        _match_executor = MatchExecutor(workers)
+    return _match_executor
+
+
+def run_parallel(jobs: Dict[Hashable, Callable]) -> Dict[Hashable, object]:
+    """Run independent matching jobs on the shared executor"""
+    return get_match_executor().run(jobs)
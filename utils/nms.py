@@ -0,0 +1,71 @@
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+
+def peak_points(
+    result: np.ndarray, threshold: float, min_dist: int = 5
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Local maxima of a cv2.matchTemplate result map at or above `threshold`.
+
+    A point is kept when it is the highest score within `min_dist` pixels in
+    both directions, so a blob of neighbouring hits around one match becomes
+    a single peak. Returns (xs, ys, scores) in the row-major order np.where
+    would give.
+    """
+    result = np.asarray(result, dtype=np.float32)
+    size = 2 * min_dist + 1
+    local_max = cv2.dilate(result, np.ones((size, size), np.uint8))
+    ys, xs = np.nonzero((result >= threshold) & (result >= local_max))
+    return xs, ys, result[ys, xs]
+
+
+def iou_suppress(
+    boxes: np.ndarray, scores: np.ndarray, overlap_threshold: float = 0.3
+) -> np.ndarray:
+    """Greedy non-maximum suppression on an (N, 4) array of (x, y, w, h) boxes.
+
+    Boxes are visited from the highest score down (ties keep their input
+    order) and dropped when their IoU with an already kept box is above
+    `overlap_threshold`. Returns the indices of the kept boxes, best first.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+
+    keep = []
+    while order.size:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        width = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        height = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        intersection = width * height
+        union = areas[best] + areas[rest] - intersection
+        iou = np.divide(
+            intersection, union, out=np.zeros_like(intersection), where=union > 0
+        )
+        order = rest[iou <= overlap_threshold]
+    return np.array(keep, dtype=np.intp)
+
+
+def center_suppress(boxes: np.ndarray, min_dist: int = 5) -> np.ndarray:
+    """Drop boxes whose center lies within `min_dist` pixels (on both axes) of
+    an earlier kept box. Returns the indices of the kept boxes in input order.
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    cx = boxes[:, 0] + boxes[:, 2] // 2
+    cy = boxes[:, 1] + boxes[:, 3] // 2
+
+    keep = []
+    remaining = np.arange(len(boxes))
+    while remaining.size:
+        first, rest = remaining[0], remaining[1:]
+        keep.append(first)
+        far = (np.abs(cx[rest] - cx[first]) > min_dist) | (
+            np.abs(cy[rest] - cy[first]) > min_dist
+        )
+        remaining = rest[far]
+    return np.array(keep, dtype=np.intp)
@@ -0,0 +1,139 @@
+import os
+import dbm
+import json
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# OCR results kept in memory, 0 disables the cache
+OCR_CACHE_SIZE = config.get("ocrCacheSize", 256)
+# Keep results evicted from memory (and those left at exit) on disk
+OCR_CACHE_SPILL = config.get("ocrCacheSpill", False)
+OCR_CACHE_PATH = os.path.join("cache", "ocr_cache")
+# Settings that change what the OCR reads from the same pixels, part of every
+# key so spilled results of another setup are never returned
+OCR_SETUP = (config.get("ocrTextDetection", False),)
+
+
+def image_key(image: np.ndarray, **params) -> bytes:
+    """Hash of an image's pixels, shape, the OCR setup and the OCR parameters
+    used on it"""
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{OCR_SETUP}{image.shape}{image.dtype}{sorted(params.items())}".encode())
+    digest.update(memoryview(image).cast("B"))
+    return digest.digest()
+
+
+class OCRCache:
+    """LRU cache of OCR results keyed by the hash of the pixels read.
+
+    HUD text (year, turn, criteria, stats) rarely changes between loop
+    iterations, so a repeated read of the same pixels costs a hash instead of
+    a model inference. Entries evicted from memory go to a dbm file when
+    `spill_path` is given and are looked up there on a memory miss.
+    """
+
+    def __init__(self, max_entries: int = OCR_CACHE_SIZE, spill_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.spill_path = spill_path
+        self.entries: "OrderedDict[bytes, str]" = OrderedDict()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._disk = None
+        self._lock = threading.Lock()
+
+    def _open_disk(self):
+        if self._disk is None and self.spill_path:
+            try:
+                os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+                self._disk = dbm.open(self.spill_path, "c")
+            except (OSError, dbm.error) as e:
+                print(f"[OCR] Could not open OCR cache file {self.spill_path}: {e}")
+                self.spill_path = None
+        return self._disk
+
+    def get(self, key: bytes) -> Optional[str]:
+        with self._lock:
+            text = self.entries.get(key)
+            if text is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return text
+
+            disk = self._open_disk()
+            if disk is not None and key in disk:
+                text = disk[key].decode("utf-8")
+                self.stats["disk_hits"] += 1
+                self._store(key, text)
+                return text
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: bytes, text: str):
+        with self._lock:
+            self._store(key, text)
+
+    def _store(self, key: bytes, text: str):
+        self.entries[key] = text
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            old_key, old_text = self.entries.popitem(last=False)
+            disk = self._open_disk()
+            if disk is not None:
+                disk[old_key] = old_text.encode("utf-8")
+
+    def close(self):
+        """Spill what is still in memory and close the disk file"""
+        with self._lock:
+            disk = self._open_disk()
+            if disk is None:
+                return
+            for key, text in self.entries.items():
+                disk[key] = text.encode("utf-8")
+            disk.close()
+            self._disk = None
+
+    def summary(self) -> dict:
+        with self._lock:
+            totals = dict(self.stats)
+        reads = sum(totals.values())
+        totals["hit_ratio"] = (totals["hits"] + totals["disk_hits"]) / reads if reads else 0.0
+        return totals
+
+
+_ocr_cache = None
+
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """Get the shared OCR cache, None when `ocrCacheSize` is 0"""
+    global _ocr_cache
+    if _ocr_cache is None and OCR_CACHE_SIZE > 0:
+        _ocr_cache = OCRCache(OCR_CACHE_SIZE, OCR_CACHE_PATH if OCR_CACHE_SPILL else None)
+    return _ocr_cache
+
+
+@atexit.register
+def _close_ocr_cache():
+    if _ocr_cache is None:
+        return
+    totals = _ocr_cache.summary()
+    print(
+        f"[OCR] Cache: {totals['hits']} hits, {totals['disk_hits']} disk hits, "
+        f"{totals['misses']} misses ({totals['hit_ratio']:.0%} of reads skipped OCR)"
+    )
+    try:
+        _ocr_cache.close()
+    except (OSError, dbm.error) as e:
+        print(f"[OCR] Could not save OCR cache: {e}")
@@ -0,0 +1,120 @@
+import math
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Coarse levels tried from the coarsest; a level is usable while the shrunken
+# template keeps at least MIN_COARSE_SIDE pixels on its shortest side
+COARSE_FACTORS = (0.125, 0.25, 0.5)
+MIN_COARSE_SIDE = 8
+# Coarse scores are blurrier than full-scale ones, so candidates are kept
+# down to `threshold - COARSE_MARGIN`
+COARSE_MARGIN = 0.25
+
+
+def coarse_factor(template_shape) -> Optional[float]:
+    """Coarsest pyramid factor for a template, None if it is too small to shrink"""
+    shortest = min(template_shape[:2])
+    for factor in COARSE_FACTORS:
+        if shortest * factor >= MIN_COARSE_SIDE:
+            return factor
+    return None
+
+
+def _coarse_candidates(result: np.ndarray, size, threshold: float, top_k: int):
+    """Top-k peaks of a coarse result map, each one suppressing its neighbourhood"""
+    result = result.copy()
+    width, height = size
+    candidates = []
+    for _ in range(top_k):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(result)
+        if max_val < threshold:
+            break
+        candidates.append((x, y))
+        result[
+            max(0, y - height // 2) : y + height // 2 + 1,
+            max(0, x - width // 2) : x + width // 2 + 1,
+        ] = -1
+    return candidates
+
+
+def pyramid_match(
+    image: np.ndarray,
+    template: np.ndarray,
+    threshold: float,
+    top_k: int = 4,
+    coarse_image: Optional[np.ndarray] = None,
+    coarse_template: Optional[np.ndarray] = None,
+    factor: Optional[float] = None,
+    shift: Tuple[float, float] = (0.0, 0.0),
+) -> List[Tuple[float, int, int]]:
+    """Coarse-to-fine TM_CCOEFF_NORMED matching.
+
+    The template is first correlated against `coarse_image` (the image
+    shrunk by `factor`); only the `top_k` best coarse peaks are refined by
+    matching the full-scale template in small windows of `image`. Callers
+    holding cached downscaled copies pass them in, otherwise they are
+    resized here. `shift` is the position of the coarse image's origin in
+    `image` pixels when the two crops are not aligned.
+
+    Returns every refined (score, x, y) at or above `threshold`, best first,
+    with positions in `image` coordinates as cv2.matchTemplate would report.
+    Falls back to a plain full-scale match when the template is too small to
+    shrink.
+    """
+    tH, tW = template.shape[:2]
+    if image.shape[0] < tH or image.shape[1] < tW:
+        return []
+
+    factor = factor or coarse_factor(template.shape)
+    if factor is None:
+        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+        ys, xs = np.where(result >= threshold)
+        return sorted(
+            ((float(result[y, x]), int(x), int(y)) for x, y in zip(xs, ys)),
+            reverse=True,
+        )
+
+    if coarse_image is None:
+        coarse_image = cv2.resize(
+            image,
+            (int(image.shape[1] * factor), int(image.shape[0] * factor)),
+            interpolation=cv2.INTER_AREA,
+        )
+    if coarse_template is None:
+        coarse_template = cv2.resize(
+            template,
+            (max(1, round(tW * factor)), max(1, round(tH * factor))),
+            interpolation=cv2.INTER_AREA,
+        )
+    cH, cW = coarse_template.shape[:2]
+    if coarse_image.shape[0] < cH or coarse_image.shape[1] < cW:
+        return []
+
+    coarse_result = cv2.matchTemplate(coarse_image, coarse_template, cv2.TM_CCOEFF_NORMED)
+    candidates = _coarse_candidates(
+        coarse_result, (cW, cH), threshold - COARSE_MARGIN, top_k
+    )
+
+    # One coarse pixel spans 1 / factor full-scale pixels, plus rounding slack
+    pad = int(math.ceil(2 / factor)) + 1
+    matches = {}
+    for cx, cy in candidates:
+        x = int(round(cx / factor + shift[0]))
+        y = int(round(cy / factor + shift[1]))
+        left, top = max(0, x - pad), max(0, y - pad)
+        right = min(image.shape[1], x + tW + pad)
+        bottom = min(image.shape[0], y + tH + pad)
+        if right - left < tW or bottom - top < tH:
+            continue
+
+        result = cv2.matchTemplate(
+            image[top:bottom, left:right], template, cv2.TM_CCOEFF_NORMED
+        )
+        ys, xs = np.where(result >= threshold)
+        for wx, wy in zip(xs, ys):
+            position = (int(wx) + left, int(wy) + top)
+            matches[position] = max(matches.get(position, -1.0), float(result[wy, wx]))
+
+    return sorted(((score, x, y) for (x, y), score in matches.items()), reverse=True)
@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+import argparse
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# Fingerprint index built with `python -m utils.screen_classifier build <folder>`
+SCREEN_INDEX = config.get("screenIndex", os.path.join("cache", "screen_index.npz"))
+# Thumbnail (width, height) a screen is reduced to, keeps the phone's 9:16 shape
+THUMB_SIZE = (18, 32)
+# Largest distance (1 - correlation) to the closest reference still accepted
+MAX_DISTANCE = 0.12
+
+
+def fingerprint(gray: np.ndarray) -> np.ndarray:
+    """Reduce a grayscale screen to a zero-mean, unit-length thumbnail vector.
+
+    The dot product of two fingerprints is the correlation of the two
+    thumbnails, so brightness and contrast changes barely move it.
+    """
+    thumb = cv2.resize(gray, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    vector = thumb.astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class ScreenIndex:
+    """Labelled reference fingerprints, looked up by nearest neighbour.
+
+    Built from a folder holding one sub-folder of screenshots per screen
+    type, e.g. `screens/lobby/*.png`, `screens/event/*.png`.
+    """
+
+    def __init__(self, labels: List[str], vectors: np.ndarray, max_distance: float = MAX_DISTANCE):
+        self.labels = list(labels)
+        # An index without screens keeps a (0, n) shape, reshape cannot infer it
+        self.vectors = np.asarray(vectors, dtype=np.float32).reshape(
+            len(self.labels), THUMB_SIZE[0] * THUMB_SIZE[1]
+        )
+        self.max_distance = max_distance
+
+    @classmethod
+    def build(cls, folder: str) -> "ScreenIndex":
+        labels, vectors = [], []
+        for label in sorted(os.listdir(folder)):
+            label_dir = os.path.join(folder, label)
+            if not os.path.isdir(label_dir):
+                continue
+            for filename in sorted(os.listdir(label_dir)):
+                if not filename.lower().endswith(".png"):
+                    continue
+                gray = cv2.imread(os.path.join(label_dir, filename), cv2.IMREAD_GRAYSCALE)
+                if gray is None:
+                    print(f"[SCREEN] Could not read {filename}, skipped")
+                    continue
+                labels.append(label)
+                vectors.append(fingerprint(gray))
+        return cls(labels, np.array(vectors, dtype=np.float32))
+
+    @classmethod
+    def load(cls, path: str) -> "ScreenIndex":
+        data = np.load(path)
+        return cls([str(label) for label in data["labels"]], data["vectors"])
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(path, labels=np.array(self.labels), vectors=self.vectors)
+
+    def classify(self, gray: np.ndarray) -> Tuple[Optional[str], float]:
+        """Return (label, distance) of the closest reference, label None when
+        nothing is within max_distance"""
+        if not self.labels:
+            return None, 1.0
+        distances = 1.0 - self.vectors @ fingerprint(gray)
+        best = int(np.argmin(distances))
+        distance = float(distances[best])
+        if distance > self.max_distance:
+            return None, distance
+        return self.labels[best], distance
+
+
+_screen_index = None
+_screen_index_loaded = False
+
+
+def get_screen_index() -> Optional[ScreenIndex]:
+    """Get the screen index from `screenIndex`, None when it was not built"""
+    global _screen_index, _screen_index_loaded
+    if not _screen_index_loaded:
+        _screen_index_loaded = True
+        if os.path.exists(SCREEN_INDEX):
+            _screen_index = ScreenIndex.load(SCREEN_INDEX)
+            print(f"[SCREEN] Loaded {len(_screen_index.labels)} reference screens")
+    return _screen_index
+
+
+def classify_screen(frame) -> Optional[str]:
+    """Screen type of a frame (e.g. 'lobby', 'event'), None when unknown or
+    when no index is available"""
+    index = get_screen_index()
+    if index is None or frame is None:
+        return None
+    label, _ = index.classify(frame.gray)
+    return label
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the screen fingerprint index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser(
+        "build", help="Index a folder with one sub-folder of screenshots per screen type"
+    )
+    build_parser.add_argument("folder")
+    build_parser.add_argument("--output", default=SCREEN_INDEX)
+
+    classify_parser = subparsers.add_parser("classify", help="Classify screenshots")
+    classify_parser.add_argument("images", nargs="+")
+    classify_parser.add_argument("--index", default=SCREEN_INDEX)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        index = ScreenIndex.build(args.folder)
+        index.save(args.output)
+        counts = {label: index.labels.count(label) for label in sorted(set(index.labels))}
+        print(f"[SCREEN] Indexed {len(index.labels)} screens into {args.output}: {counts}")
+        return
+
+    if not os.path.exists(args.index):
+        print(f"[SCREEN] No index at {args.index}, build one first")
+        sys.exit(1)
+    index = ScreenIndex.load(args.index)
+    for path in args.images:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            print(f"[SCREEN] Could not read {path}")
+            continue
+        start = time.perf_counter()
+        label, distance = index.classify(gray)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{path}: {label or 'unknown'} (distance {distance:.3f}, {elapsed:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
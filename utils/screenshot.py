@@ -1,13 +1,18 @@
 import os
 import json
 import time
+import threading
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
 
-from PIL import Image, ImageEnhance
+from PIL import Image
+import cv2
 import mss
 import numpy as np
 
 from utils.adb_utils import get_adb_controller
+from utils.capture import crop_region, snapshot_frame
 
 # Load config
 try:
@@ -17,6 +22,19 @@ except FileNotFoundError:
     config = {"usePhone": False}
 
 USE_PHONE = config.get("usePhone", True)
+# Contrast factor of the OCR crops, ImageEnhance.Contrast's meaning
+OCR_CONTRAST = 1.5
+# PIL's bicubic kernel (a = -0.5) sampled for a 2x upscale. Filtering a crop
+# with zeros stuffed between its pixels interleaves both sampling phases, so
+# one separable filter does the resize.
+UPSCALE_KERNEL = np.array(
+    [-0.0234375, -0.0703125, 0.2265625, 0.8671875, 0.8671875, 0.2265625, -0.0703125, -0.0234375],
+    np.float32,
+)
+
+# Per thread buffers of enhance_for_ocr by crop size, the OCR regions are
+# few and fixed
+_scratch = threading.local()
 
 
 def save_debug_image(image: Image.Image, prefix: str = "debug") -> str:
@@ -47,48 +65,84 @@ def save_debug_image(image: Image.Image, prefix: str = "debug") -> str:
     return filepath
 
 
-def enhanced_screenshot(region=(0, 0, 1920, 1080), save_debug=False, name=None) -> Image.Image:
+def _scratch_buffer(name: str, shape) -> np.ndarray:
+    buffers = _scratch.__dict__.setdefault("buffers", {})
+    buffer = buffers.get((name, shape))
+    if buffer is None:
+        buffer = buffers[(name, shape)] = np.zeros(shape, np.uint8)
+    return buffer
+
+
+@lru_cache(maxsize=256)
+def contrast_lut(mean: int, factor: float = OCR_CONTRAST) -> np.ndarray:
+    """Lookup table of ImageEnhance.Contrast(factor) on an image whose mean
+    gray level is `mean`: PIL blends every pixel with that mean in float32
+    and truncates, so the table gives the same bytes"""
+    values = np.float32(mean) + np.float32(factor) * (np.arange(256, dtype=np.float32) - mean)
+    return np.clip(values, 0, 255).astype(np.uint8)
+
+
+def enhance_for_ocr(
+    image: np.ndarray, code: int = cv2.COLOR_RGB2GRAY, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Grayscale, 2x bicubic upscale and contrast stretch of a crop for OCR,
+    as the former PIL resize, convert("L") and ImageEnhance.Contrast.
+
+    Works on frame slices directly: `code` converts the crop to grayscale
+    (e.g. cv2.COLOR_BGRA2GRAY for desktop captures) before the upscale so
+    only one channel is resized. The result is written to `out` when it has
+    the upscaled shape, a new array otherwise.
+    """
+    height, width = image.shape[:2]
+    gray = _scratch_buffer("gray", (height, width))
+    cv2.cvtColor(image, code, dst=gray)
+    # Only the even rows and columns are written, the others stay zero
+    stuffed = _scratch_buffer("stuffed", (height * 2, width * 2))
+    stuffed[::2, ::2] = gray
+    scaled = _scratch_buffer("scaled", (height * 2, width * 2))
+    cv2.sepFilter2D(
+        stuffed, -1, UPSCALE_KERNEL, UPSCALE_KERNEL,
+        dst=scaled, anchor=(4, 4), borderType=cv2.BORDER_REFLECT_101,
+    )
+
+    # ImageEnhance.Contrast stretches around the rounded mean gray level
+    mean = int(cv2.mean(scaled)[0] + 0.5)
+    if out is None or out.shape != scaled.shape or out.dtype != np.uint8:
+        out = np.empty_like(scaled)
+    return cv2.LUT(scaled, contrast_lut(mean), dst=out)
+
+
+def enhanced_screenshot(
+    region=(0, 0, 1920, 1080), save_debug=False, name=None, frame=None
+) -> np.ndarray:
+    """Grayscale crop of a region, enhanced for OCR (see enhance_for_ocr)"""
     # Check if usePhone is enabled
     if USE_PHONE:
         # Use ADB screenshot for phone mode
         try:
             controller = get_adb_controller()
             if controller and controller.is_connected():
-                # Take full screenshot from phone
-                screenshot = controller.take_screenshot()
-                
-                if screenshot is not None:
-                    # Convert numpy array to PIL Image
-                    pil_img = Image.fromarray(screenshot)
-
-                    # # Save screenshot to file for debugging
-                    # pil_img.save("screenshot-screenshot.png")
+                # Use the shared frame snapshot of the phone screen
+                frame = frame or snapshot_frame()
+                screenshot = frame.rgb if frame is not None else None
 
+                if screenshot is not None:
                     # Crop to the specified region if not full screen
                     if region != (0, 0, 1920, 1080):
                         # print(f"[DEBUG] Cropping to region: {region}")
-                        pil_img = pil_img.crop(
-                            (
-                                region[0],
-                                region[1],
-                                region[0] + region[2],
-                                region[1] + region[3],
-                            )
-                        )
+                        screenshot = crop_region(screenshot, region)
 
                     # Apply enhancements for OCR
-                    pil_img = pil_img.resize(
-                        (pil_img.width * 2, pil_img.height * 2), Image.BICUBIC
-                    )
-                    pil_img = pil_img.convert("L")
-                    pil_img = ImageEnhance.Contrast(pil_img).enhance(1.5)
+                    enhanced = enhance_for_ocr(screenshot)
 
                     # Save debug image if requested
                     if save_debug:
-                        save_debug_image(pil_img, f"{name}_enhanced_screenshot")
+                        save_debug_image(
+                            Image.fromarray(enhanced), f"{name}_enhanced_screenshot"
+                        )
                         time.sleep(1)
 
-                    return pil_img
+                    return enhanced
                 else:
                     print(
                         "[WARNING] Could not take ADB screenshot, falling back to desktop"
@@ -107,44 +161,35 @@ def enhanced_screenshot(region=(0, 0, 1920, 1080), save_debug=False, name=None)
             "height": region[3],
         }
         img = sct.grab(monitor)
-        img_np = np.array(img)
-        img_rgb = img_np[:, :, :3][:, :, ::-1]
-        pil_img = Image.fromarray(img_rgb)
-
-    pil_img = pil_img.resize((pil_img.width * 2, pil_img.height * 2), Image.BICUBIC)
-    pil_img = pil_img.convert("L")
-    pil_img = ImageEnhance.Contrast(pil_img).enhance(1.5)
+        # mss captures BGRA
+        enhanced = enhance_for_ocr(np.asarray(img), cv2.COLOR_BGRA2GRAY)
 
     # Save debug image if requested
     if save_debug:
-        save_debug_image(pil_img, f"{name}_enhanced_screenshot")
+        save_debug_image(Image.fromarray(enhanced), f"{name}_enhanced_screenshot")
 
-    return pil_img
+    return enhanced
 
 
-def capture_region(region=(0, 0, 1920, 1080), save_debug=False, name=None) -> Image.Image:
+def capture_region(
+    region=(0, 0, 1920, 1080), save_debug=False, name=None, frame=None
+) -> Image.Image:
     # Check if usePhone is enabled
     if USE_PHONE:
         # Use ADB screenshot for phone mode
         try:
             controller = get_adb_controller()
             if controller and controller.is_connected():
-                # Take full screenshot from phone
-                screenshot = controller.take_screenshot()
+                # Use the shared frame snapshot of the phone screen
+                frame = frame or snapshot_frame()
+                screenshot = frame.rgb if frame is not None else None
                 if screenshot is not None:
-                    # Convert numpy array to PIL Image
-                    pil_img = Image.fromarray(screenshot)
-
                     # Crop to the specified region if not full screen
                     if region != (0, 0, 1920, 1080):
-                        pil_img = pil_img.crop(
-                            (
-                                region[0],
-                                region[1],
-                                region[0] + region[2],
-                                region[1] + region[3],
-                            )
-                        )
+                        screenshot = crop_region(screenshot, region)
+
+                    # Convert numpy array to PIL Image
+                    pil_img = Image.fromarray(screenshot)
 
                     if save_debug:
                         save_debug_image(pil_img, f"{name}_capture_region")
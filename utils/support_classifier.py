@@ -0,0 +1,216 @@
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Support card type icons the color signatures are learned from. Types the bot
+# does not count (guts, friend) are still classified so their badges are not
+# mistaken for a close color.
+SUPPORT_TYPE_ICONS = {
+    "spd": "assets/icons/support_card_type_spd.png",
+    "sta": "assets/icons/support_card_type_sta.png",
+    "pwr": "assets/icons/support_card_type_pwr.png",
+    "guts": "assets/icons/support_card_type_guts.png",
+    "wit": "assets/icons/support_card_type_wit.png",
+    "friend": "assets/icons/support_card_type_friend.png",
+}
+# Pixels with at least this saturation and value make up the colored badges
+MIN_SATURATION = 100
+MIN_VALUE = 120
+# OpenCV hue runs 0-179, two hue units per bin keep pwr (~18) and friend (~21)
+# apart
+HUE_BINS = 90
+# Badges are segmented per group of similar signature hues (pwr and friend
+# share one), so a badge touching a differently colored portrait stays whole.
+# A pixel joins a group within HUE_TOLERANCE of one of its signature peaks.
+HUE_TOLERANCE = 8
+# Size range of a badge relative to the icon assets, and the smallest share
+# of a badge's bounding box its colored pixels must cover
+SIZE_RANGE = (0.7, 1.5)
+MIN_FILL = 0.45
+# Smallest cosine similarity between a badge's hue histogram and a signature
+MIN_SIMILARITY = 0.8
+# Crops are searched on every SAMPLE_STEP-th pixel per axis: a badge keeps
+# enough pixels for its hue histogram and every stage touches a quarter of
+# the crop.
+SAMPLE_STEP = 2
+
+
+def hue_histograms(hue: np.ndarray, labels: np.ndarray, count: int) -> np.ndarray:
+    """Hue histograms of every labelled component at once, L2 normalized.
+
+    `labels` holds a component index per pixel (0 = background). Returns a
+    (count, HUE_BINS) array whose row i describes component i.
+    """
+    bins = (hue.astype(np.int64) * HUE_BINS) // 180
+    valid = labels > 0
+    index = labels[valid].astype(np.int64) * HUE_BINS + bins[valid]
+    histograms = np.bincount(index, minlength=count * HUE_BINS).astype(np.float32)
+    histograms = histograms.reshape(count, HUE_BINS)
+    norms = np.linalg.norm(histograms, axis=1, keepdims=True)
+    return np.divide(histograms, norms, out=np.zeros_like(histograms), where=norms > 0)
+
+
+def color_mask(bgr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(hue, mask) of the strongly colored pixels of a BGR image, the mask
+    being 255 on those pixels"""
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, (0, MIN_SATURATION, MIN_VALUE), (180, 255, 255))
+    return cv2.extractChannel(hsv, 0), mask
+
+
+class SupportTypeClassifier:
+    """Counts support cards per type from the colors of their type badges.
+
+    Badges are found as connected components of strongly colored pixels whose
+    size matches the type icons, then labelled by comparing their hue
+    histogram with each type's signature learned from the icon assets.
+    """
+
+    def __init__(self, icons: Dict[str, str] = SUPPORT_TYPE_ICONS):
+        self.types: List[str] = []
+        signatures = []
+        sizes = []
+        for support_type, icon_path in icons.items():
+            icon = cv2.imread(icon_path, cv2.IMREAD_COLOR)
+            if icon is None:
+                print(f"[SUPPORT] Could not load icon: {icon_path}")
+                continue
+            hue, mask = color_mask(icon)
+            self.types.append(support_type)
+            signatures.append(hue_histograms(hue, (mask > 0).astype(np.int32), 2)[1])
+            sizes.append(icon.shape[:2])
+
+        self.signatures = np.array(signatures, dtype=np.float32)
+        self.hue_groups = self._hue_group_table()
+        heights, widths = zip(*sizes) if sizes else ((19,), (18,))
+        # Badge sizes on the sampled grid find_badges works on
+        self.min_size = (
+            min(widths) * SIZE_RANGE[0] / SAMPLE_STEP,
+            min(heights) * SIZE_RANGE[0] / SAMPLE_STEP,
+        )
+        self.max_size = (
+            max(widths) * SIZE_RANGE[1] / SAMPLE_STEP,
+            max(heights) * SIZE_RANGE[1] / SAMPLE_STEP,
+        )
+
+    def _hue_group_table(self) -> np.ndarray:
+        """256-entry lookup table from hue (0-179) to hue group, 0 when no
+        signature is near"""
+        peaks = sorted(
+            int(np.argmax(signature)) * 180 // HUE_BINS + 1 for signature in self.signatures
+        )
+        table = np.zeros(256, np.uint8)
+        hues = np.arange(256)
+        group = 0
+        previous = None
+        for peak in peaks:
+            if previous is None or peak - previous > HUE_TOLERANCE:
+                group += 1
+            distance = np.abs(hues - peak)
+            distance = np.minimum(distance, 180 - distance)
+            table[(distance <= HUE_TOLERANCE) & (hues < 180)] = group
+            previous = peak
+        # Hue wraps around, red peaks at both ends belong together
+        if len(peaks) > 1 and peaks[0] + 180 - peaks[-1] <= HUE_TOLERANCE:
+            table[table == group] = 1
+        return table
+
+    def _badge_sized(self, stats: np.ndarray) -> np.ndarray:
+        """Which connectedComponentsWithStats rows look like a badge"""
+        widths = stats[:, cv2.CC_STAT_WIDTH]
+        heights = stats[:, cv2.CC_STAT_HEIGHT]
+        fill = stats[:, cv2.CC_STAT_AREA] / np.maximum(widths * heights, 1)
+        return (
+            (widths >= self.min_size[0])
+            & (heights >= self.min_size[1])
+            & (widths <= self.max_size[0])
+            & (heights <= self.max_size[1])
+            & (fill >= MIN_FILL)
+        )
+
+    def find_badges(self, bgr: np.ndarray) -> Tuple[List[Tuple[int, int, int, int]], np.ndarray]:
+        """Locate badge-sized components of strongly colored pixels.
+
+        Components too large to be a badge (a badge touching a colored
+        portrait) are split again per hue group. Returns the badges' (x, y,
+        w, h) boxes in crop pixels and a (badges, HUE_BINS) array of their hue
+        histograms.
+        """
+        sampled = cv2.resize(
+            bgr, None, fx=1 / SAMPLE_STEP, fy=1 / SAMPLE_STEP, interpolation=cv2.INTER_NEAREST
+        )
+        hue, mask = color_mask(sampled)
+        groups = cv2.bitwise_and(cv2.LUT(hue, self.hue_groups), mask)
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(
+            cv2.compare(groups, 0, cv2.CMP_GT), connectivity=8
+        )
+
+        boxes, histograms = [], []
+
+        def add_badge(component_labels, component_id, x, y, w, h):
+            badge_labels = (component_labels == component_id).astype(np.int32)
+            boxes.append(tuple(v * SAMPLE_STEP for v in (x, y, w, h)))
+            histograms.append(hue_histograms(hue[y : y + h, x : x + w], badge_labels, 2)[1])
+
+        is_badge = self._badge_sized(stats)
+        too_large = (stats[:, cv2.CC_STAT_WIDTH] > self.max_size[0]) | (
+            stats[:, cv2.CC_STAT_HEIGHT] > self.max_size[1]
+        )
+        for component_id in range(1, len(stats)):
+            x, y, w, h = (int(v) for v in stats[component_id, :4])
+            if is_badge[component_id]:
+                add_badge(labels[y : y + h, x : x + w], component_id, x, y, w, h)
+            elif too_large[component_id]:
+                area = groups[y : y + h, x : x + w]
+                for group in np.unique(area[labels[y : y + h, x : x + w] == component_id]):
+                    _, group_labels, group_stats, _ = cv2.connectedComponentsWithStats(
+                        cv2.compare(area, int(group), cv2.CMP_EQ), connectivity=8
+                    )
+                    for group_id in np.nonzero(self._badge_sized(group_stats))[0]:
+                        if group_id == 0:
+                            continue
+                        gx, gy, gw, gh = (int(v) for v in group_stats[group_id, :4])
+                        add_badge(
+                            group_labels[gy : gy + gh, gx : gx + gw],
+                            group_id,
+                            x + gx,
+                            y + gy,
+                            gw,
+                            gh,
+                        )
+        return boxes, np.array(histograms, dtype=np.float32).reshape(-1, HUE_BINS)
+
+    def classify(self, bgr: np.ndarray) -> List[Tuple[str, Tuple[int, int, int, int], float]]:
+        """Label every badge in a BGR crop, returns (type, box, similarity)"""
+        boxes, histograms = self.find_badges(bgr)
+        if not boxes or not len(self.types):
+            return []
+
+        # Cosine similarity of every badge against every signature at once
+        similarity = histograms @ self.signatures.T
+        best = similarity.argmax(axis=1)
+        scores = similarity[np.arange(len(best)), best]
+        return [
+            (self.types[type_index], box, float(score))
+            for box, type_index, score in zip(boxes, best, scores)
+            if score >= MIN_SIMILARITY
+        ]
+
+    def count(self, bgr: np.ndarray) -> Dict[str, int]:
+        """Number of support cards of each type in a BGR crop"""
+        counts = {support_type: 0 for support_type in self.types}
+        for support_type, _, _ in self.classify(bgr):
+            counts[support_type] += 1
+        return counts
+
+
+_support_classifier: Optional[SupportTypeClassifier] = None
+
+
+def get_support_classifier() -> SupportTypeClassifier:
+    """Get or create the shared support type classifier"""
+    global _support_classifier
+    if _support_classifier is None:
+        _support_classifier = SupportTypeClassifier()
+    return _support_classifier
@@ -0,0 +1,135 @@
+import os
+import json
+import threading
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from utils.pyramid import coarse_factor
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# Reload templates whose file changed on disk, useful while editing assets
+TEMPLATE_HOT_RELOAD = config.get("templateHotReload", False)
+ASSETS_DIR = "assets"
+
+
+class Template:
+    """A template image kept in memory in the layouts the matchers use"""
+
+    def __init__(self, path: str, bgr: np.ndarray, mtime: float):
+        self.path = path
+        self.mtime = mtime
+        self.bgr = np.ascontiguousarray(bgr)
+        self.height, self.width = self.bgr.shape[:2]
+        self._scaled: Dict[float, np.ndarray] = {}
+
+    def scaled(self, scale: float) -> np.ndarray:
+        """Return the template resized by `scale`, computed once per scale"""
+        if scale == 1.0:
+            return self.bgr
+        if scale not in self._scaled:
+            size = (
+                max(1, int(round(self.width * scale))),
+                max(1, int(round(self.height * scale))),
+            )
+            self._scaled[scale] = cv2.resize(self.bgr, size, interpolation=cv2.INTER_AREA)
+        return self._scaled[scale]
+
+
+class TemplateBank:
+    """Registry of every template under `assets/`, loaded once and reused.
+
+    Templates are looked up by path ("assets/buttons/next_btn.png") or by
+    name relative to the assets folder without extension ("buttons/next_btn").
+    The coarse copy pyramid matching correlates first is made when a
+    template is loaded, so preloading leaves no resize for the first match.
+    """
+
+    def __init__(self, root: str = ASSETS_DIR, hot_reload: bool = False):
+        self.root = root
+        self.hot_reload = hot_reload
+        self._templates: Dict[str, Template] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, path_or_name: str) -> str:
+        path = path_or_name
+        if not path.lower().endswith(".png"):
+            path = os.path.join(self.root, f"{path}.png")
+        return os.path.normpath(path)
+
+    def name_of(self, path: str) -> str:
+        relative = os.path.relpath(os.path.normpath(path), self.root)
+        return os.path.splitext(relative)[0].replace(os.sep, "/")
+
+    def _load(self, key: str) -> Optional[Template]:
+        try:
+            mtime = os.path.getmtime(key)
+        except OSError:
+            return None
+
+        bgr = cv2.imread(key, cv2.IMREAD_COLOR)
+        if bgr is None:
+            return None
+
+        template = Template(key, bgr, mtime)
+        factor = coarse_factor(bgr.shape)
+        if factor is not None:
+            template.scaled(factor)
+        return template
+
+    def preload(self) -> int:
+        """Load every PNG under the assets folder, returns the template count"""
+        for directory, _, files in os.walk(self.root):
+            for filename in files:
+                if filename.lower().endswith(".png"):
+                    self.get(os.path.join(directory, filename))
+        return len(self._templates)
+
+    def get(self, path_or_name: str) -> Optional[Template]:
+        """Return the template, loading it on first use. None if it cannot be read"""
+        key = self._key(path_or_name)
+        template = self._templates.get(key)
+
+        if template is not None and self.hot_reload:
+            try:
+                if os.path.getmtime(key) != template.mtime:
+                    print(f"[TEMPLATES] Reloading changed template: {key}")
+                    template = None
+            except OSError:
+                pass
+
+        if template is None:
+            template = self._load(key)
+            if template is not None:
+                with self._lock:
+                    self._templates[key] = template
+        return template
+
+
+_template_bank = None
+
+
+def get_template_bank() -> TemplateBank:
+    """Get or create the shared template bank"""
+    global _template_bank
+    if _template_bank is None:
+        _template_bank = TemplateBank(hot_reload=TEMPLATE_HOT_RELOAD)
+    return _template_bank
+
+
+def load_template(path: str) -> Optional[np.ndarray]:
+    """Return the cached BGR template for `path`, or None if it cannot be read"""
+    template = get_template_bank().get(path)
+    return template.bgr if template is not None else None
+
+
+def preload_templates() -> int:
+    """Load all assets into the template bank, returns the template count"""
+    return get_template_bank().preload()